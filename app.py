@@ -6,8 +6,9 @@ from components.auth import init_auth, show_auth_modal
 from components.dashboard import show_dashboard
 from components.interview import show_interview
 from components.results import show_results
-from utils.db_utils import init_db
+from db_utils import init_db
 from utils.auth_utils import init_auth_session
+from utils.llm_metrics import set_attribution
 
 # Set page config
 st.set_page_config(
@@ -186,6 +187,9 @@ if 'interview_completed' not in st.session_state:
 
 # Main application flow
 def main():
+    # Bill this run's model calls to the signed-in user and their interview
+    set_attribution(st.session_state.get('user_id'), st.session_state.get('interview_id'))
+
     # Show login modal if needed
     if st.session_state.get('show_login', False):
         show_auth_modal()
@@ -0,0 +1,81 @@
+import argparse
+import hashlib
+import sys
+from utils.corpus import Corpus, CorpusError, write_corpus
+from utils.question_bank import DATA_PATH, CORPUS_PATH, QuestionBank, read_csv_columns
+from utils.answer_scorer import SCORER_PATH, fit_answer_scorer
+
+def file_digest(path):
+    """SHA-256 of a file's contents"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).digest()
+
+def build_corpus(csv_path=DATA_PATH, corpus_path=CORPUS_PATH):
+    """Compile the question CSV into a memory-mappable corpus file"""
+    bank = QuestionBank.from_csv(csv_path)
+    write_corpus(
+        corpus_path,
+        bank.type_names,
+        bank.category_names,
+        bank.type_ids,
+        bank.category_ids,
+        bank.questions,
+        bank.answers,
+        file_digest(csv_path)
+    )
+    print(f"Wrote {len(bank)} questions to {corpus_path}")
+
+def validate_corpus(csv_path=DATA_PATH, corpus_path=CORPUS_PATH):
+    """Check a corpus file row by row against the CSV it was built from"""
+    try:
+        corpus = Corpus(corpus_path)
+    except (OSError, CorpusError) as e:
+        print(f"❌ Could not open corpus: {str(e)}")
+        return False
+
+    errors = []
+    if corpus.source_digest != file_digest(csv_path):
+        errors.append(f"{csv_path} has changed since the corpus was built")
+
+    types, categories, questions, answers = read_csv_columns(csv_path)
+    if len(corpus) != len(questions):
+        errors.append(f"corpus has {len(corpus)} rows, CSV has {len(questions)}")
+    else:
+        for row_id in range(len(questions)):
+            expected = (types[row_id], categories[row_id], questions[row_id], answers[row_id])
+            actual = (
+                corpus.type_names[corpus.type_ids[row_id]],
+                corpus.category_names[corpus.category_ids[row_id]],
+                corpus.questions[row_id],
+                corpus.answers[row_id]
+            )
+            if actual != expected:
+                errors.append(f"row {row_id} differs from the CSV")
+
+    for error in errors[:10]:
+        print(f"❌ {error}")
+    if errors:
+        return False
+    print(f"✅ {corpus_path} matches {csv_path} ({len(corpus)} questions)")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build and validate the compiled question corpus")
+    parser.add_argument('--csv', default=DATA_PATH, help="source CSV")
+    parser.add_argument('--out', default=CORPUS_PATH, help="corpus file to write")
+    parser.add_argument('--check', action='store_true', help="only validate an existing corpus")
+    parser.add_argument('--scorer', default=SCORER_PATH, help="answer scorer file to write")
+    parser.add_argument('--embeddings', action='store_true',
+                        help="also precompute ideal-answer embeddings (EMBEDDING_MODEL_DIR)")
+    args = parser.parse_args()
+
+    if not args.check:
+        build_corpus(args.csv, args.out)
+        bank = QuestionBank.from_csv(args.csv)
+        fit_answer_scorer(bank, args.scorer)
+        print(f"Wrote answer scorer to {args.scorer}")
+        if args.embeddings:
+            from utils.embedding_scorer import EMBEDDINGS_PATH, load_embedding_scorer
+            load_embedding_scorer(bank)
+            print(f"Answer embeddings are up to date in {EMBEDDINGS_PATH}")
+    sys.exit(0 if validate_corpus(args.csv, args.out) else 1)
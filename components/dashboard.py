@@ -1,32 +1,12 @@
 
 import streamlit as st
-import pandas as pd
-from pathlib import Path
 from components.auth import show_auth_buttons
 from utils.interview_utils import get_random_question
+from utils.question_sampler import get_question_sampler
+from utils.question_bank import get_question_bank, DATA_PATH
 import time
 from components.history import show_history
 
-def load_data():
-    """Load interview questions data"""
-    try:
-        current_dir = Path(__file__).parent.parent
-        data_path = current_dir / 'interview_qa_combined.csv'
-        
-        if not data_path.exists():
-            st.error(f"Data file not found at {data_path}")
-            return None
-            
-        df = pd.read_csv(data_path)
-        if df.empty:
-            st.error("The dataset is empty")
-            return None
-            
-        return df
-    except Exception as e:
-        st.error(f"Error loading data: {str(e)}")
-        return None
-
 def show_dashboard():
     """Show the main dashboard with enhanced UI"""
     show_auth_buttons()
@@ -109,9 +89,11 @@ def show_dashboard():
         </div>
     """, unsafe_allow_html=True)
 
-    data = load_data()
-    if data is not None:
-        categories = ["All"] + list(data['Category'].unique())
+    bank = get_question_bank()
+    if bank is None:
+        st.error(f"Could not load interview questions from {DATA_PATH}")
+    else:
+        categories = bank.categories
         selected_category = st.selectbox(
             "Select Interview Category",
             categories,
@@ -128,7 +110,9 @@ def show_dashboard():
                 with st.spinner('🎯 Preparing your interview...'):
                     st.session_state['interview_started'] = True
                     st.session_state['selected_category'] = selected_category
-                    st.session_state['current_question'], st.session_state['current_answer'] = get_random_question(selected_category)
+                    st.session_state['upcoming_questions'] = None
+                    st.session_state['interview_summary'] = None
+                    st.session_state['current_question'], st.session_state['current_answer'] = get_random_question(selected_category, get_question_sampler())
                     st.session_state['start_time'] = time.time()
                     st.rerun()
 
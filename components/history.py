@@ -1,6 +1,6 @@
 
 import streamlit as st
-from utils.db_utils import get_user_interviews, get_interview_responses
+from db_utils import get_user_interviews, get_interview_responses
 from datetime import datetime
 
 def show_history():
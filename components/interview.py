@@ -3,8 +3,44 @@ import time
 from components.timer import show_timer
 from components.question import show_question
 from components.feedback import show_feedback
-from utils.interview_utils import get_random_question, evaluate_answer, get_ai_response
-from db_utils import create_interview, save_question_response, update_interview_score
+from utils.interview_utils import (
+    get_random_question, prefetch_questions, evaluate_answer, stream_ai_response
+)
+from utils.question_sampler import get_question_sampler
+from utils.llm_metrics import set_attribution
+from utils.evaluation import final_score
+from db_utils import create_interview, finalize_interview, save_question_response
+
+def prefetch_next_question():
+    """Start preparing the rest of the interview's questions while the current one is answered
+
+    Each remaining question gets its own Future, kept in session_state in
+    interview order.
+    """
+    remaining = 5 - (st.session_state['question_count'] + 1)
+    if st.session_state.get('upcoming_questions') is None and remaining > 0:
+        st.session_state['upcoming_questions'] = prefetch_questions(
+            st.session_state['selected_category'],
+            remaining,
+            get_question_sampler()
+        )
+
+def take_next_question():
+    """Return the next prefetched question, waiting only for that question if it is still in flight
+
+    The wait is on the same in-flight request rather than a new one: the
+    question is already drawn and marked seen, and rephrase_question has its
+    own deadline after which it falls back to the original text.
+    """
+    upcoming = st.session_state.get('upcoming_questions')
+    pair = (None, None)
+    if upcoming:
+        pair = upcoming.pop(0).result()
+    if not upcoming:
+        st.session_state['upcoming_questions'] = None
+    if pair[0] is None:
+        return get_random_question(st.session_state['selected_category'], get_question_sampler())
+    return pair
 
 def show_interview():
     """Show the interview interface"""
@@ -39,6 +75,10 @@ def show_interview():
         st.session_state['start_time'] = time.time()
     if 'show_results' not in st.session_state:
         st.session_state['show_results'] = False
+    if 'upcoming_questions' not in st.session_state:
+        st.session_state['upcoming_questions'] = None
+    if 'interview_summary' not in st.session_state:
+        st.session_state['interview_summary'] = None
 
     # Display user info and progress
     col1, col2, col3 = st.columns([1, 1, 1])
@@ -65,6 +105,7 @@ def show_interview():
         )
         if interview_id:
             st.session_state['interview_id'] = interview_id
+            set_attribution(st.session_state['user_id'], interview_id)
 
     # Timer
     if 'start_time' in st.session_state:
@@ -78,9 +119,13 @@ def show_interview():
                 st.session_state['interview_completed'] = True
                 st.session_state['show_qa'] = True
                 st.session_state['show_results'] = True
+                if st.session_state['interview_id']:
+                    st.session_state['interview_summary'] = finalize_interview(
+                        st.session_state['interview_id']
+                    )
                 st.rerun()
             else:
-                st.session_state['current_question'], st.session_state['current_answer'] = get_random_question(st.session_state['selected_category'])
+                st.session_state['current_question'], st.session_state['current_answer'] = take_next_question()
                 st.session_state['start_time'] = time.time()
                 st.session_state['answer_key'] += 1
                 st.rerun()
@@ -92,6 +137,7 @@ def show_interview():
     if st.session_state['current_question']:
         st.markdown("### Current Question")
         st.write(st.session_state['current_question'])
+        prefetch_next_question()
         
         # Answer input with unique key
         user_answer = st.text_area("Your Answer", height=200, key=f"answer_{st.session_state['answer_key']}")
@@ -104,6 +150,9 @@ def show_interview():
                     user_answer,
                     st.session_state['current_answer']
                 )
+                if evaluation is None:
+                    st.error("Error evaluating answer. Please try again.")
+                    st.stop()
                 
                 # Store answer and evaluation
                 st.session_state['user_answers'].append(user_answer)
@@ -113,23 +162,9 @@ def show_interview():
 
                 # Save response to database
                 if st.session_state['interview_id']:
-                    # Parse evaluation to get score
-                    evaluation_lines = evaluation.split('\n')
-                    score = 0
-                    for line in evaluation_lines:
-                        if line.startswith('Score:'):
-                            try:
-                                score = float(line.split(':')[1].split('/')[0].strip())
-                                break
-                            except:
-                                continue
-
                     save_question_response(
                         st.session_state['interview_id'],
-                        st.session_state['current_question'],
                         user_answer,
-                        st.session_state['current_answer'],
-                        score,
                         evaluation,
                         int(time.time() - st.session_state['start_time'])
                     )
@@ -141,51 +176,27 @@ def show_interview():
         # Show current evaluation if it exists
         if st.session_state['current_evaluation']:
             st.markdown("### Evaluation")
-            
-            # Parse the evaluation response
-            evaluation_lines = st.session_state['current_evaluation'].split('\n')
-            score = ""
-            strengths = []
-            improvements = []
-            ideal_response = ""
-            
-            current_section = None
-            for line in evaluation_lines:
-                if line.startswith('Score:'):
-                    score = line.replace('Score:', '').strip()
-                elif line.startswith('Strengths:'):
-                    current_section = 'strengths'
-                elif line.startswith('Improvements:'):
-                    current_section = 'improvements'
-                elif line.startswith('Ideal Response:'):
-                    current_section = 'ideal'
-                elif line.strip() and current_section:
-                    if current_section == 'strengths':
-                        strengths.append(line.strip())
-                    elif current_section == 'improvements':
-                        improvements.append(line.strip())
-                    elif current_section == 'ideal':
-                        ideal_response += line.strip() + ' '
+            evaluation = st.session_state['current_evaluation']
             
             # Display score
-            st.markdown(f"### Score: {score}")
+            st.markdown(f"### Score: {evaluation.score}/10")
             
             # Display strengths
-            if strengths:
-                st.markdown("#### Key Strengths")
-                for strength in strengths:
-                    st.markdown(f"✅ {strength}")
+            if evaluation.matched_terms:
+                st.markdown("#### Key Points Covered")
+                for term in evaluation.matched_terms:
+                    st.markdown(f"✅ {term}")
             
             # Display improvements
-            if improvements:
-                st.markdown("#### Areas for Improvement")
-                for improvement in improvements:
-                    st.markdown(f"💡 {improvement}")
+            if evaluation.missing_terms:
+                st.markdown("#### Missing Key Points")
+                for term in evaluation.missing_terms:
+                    st.markdown(f"💡 {term}")
             
             # Display ideal response
-            if ideal_response:
+            if evaluation.ideal_answer:
                 st.markdown("#### Ideal Response")
-                st.markdown(ideal_response)
+                st.markdown(evaluation.ideal_answer)
             
             st.divider()
 
@@ -198,25 +209,13 @@ def show_interview():
                         st.session_state['show_qa'] = True
                         st.session_state['show_results'] = True
                         
-                        # Update final interview score
+                        # Save the final score, computed from the saved answers
                         if st.session_state['interview_id']:
-                            total_score = 0
-                            for evaluation in st.session_state['evaluations']:
-                                try:
-                                    score_line = evaluation.split('\n')[0]
-                                    score = float(score_line.split(':')[1].split('/')[0].strip())
-                                    total_score += score
-                                except:
-                                    continue
-                            
-                            avg_score = total_score / len(st.session_state['evaluations'])
-                            update_interview_score(
-                                st.session_state['interview_id'],
-                                avg_score,
-                                len(st.session_state['evaluations'])
+                            st.session_state['interview_summary'] = finalize_interview(
+                                st.session_state['interview_id']
                             )
                     else:
-                        st.session_state['current_question'], st.session_state['current_answer'] = get_random_question(st.session_state['selected_category'])
+                        st.session_state['current_question'], st.session_state['current_answer'] = take_next_question()
                         st.session_state['start_time'] = time.time()
                     st.session_state['current_evaluation'] = None
                     st.session_state['show_next_button'] = False
@@ -247,16 +246,13 @@ def show_interview():
             user_question = st.text_input("Your Question")
             if st.button("Ask Question"):
                 if user_question:
-                    # Get AI response
-                    ai_response = get_ai_response(user_question)
+                    # Show the AI response as it streams in
+                    st.markdown("### AI Response")
+                    ai_response = st.write_stream(stream_ai_response(user_question))
                     
                     # Store question and response
                     st.session_state['user_questions'].append(user_question)
                     st.session_state['ai_responses'].append(ai_response)
-                    
-                    # Show response
-                    st.markdown("### AI Response")
-                    st.write(ai_response)
                 else:
                     st.error("Please enter a question.")
         
@@ -279,32 +275,22 @@ def show_interview():
         st.markdown("### 📊 Interview Results")
         
         if st.session_state['evaluations']:
-            # Calculate average score
-            total_score = 0
-            for evaluation in st.session_state['evaluations']:
-                try:
-                    score_line = evaluation.split('\n')[0]
-                    score = int(score_line.split(':')[1].split('/')[0].strip())
-                    total_score += score
-                except:
-                    continue
-            
-            avg_score = total_score / len(st.session_state['evaluations'])
+            avg_score = final_score(st.session_state['interview_summary'], st.session_state['evaluations'])
             
             # Display overall score
             st.markdown(f"#### Overall Score: {avg_score:.1f}/10")
             
             # Display all questions and answers
             st.markdown("#### Question-by-Question Breakdown")
-            for i, (question, answer, evaluation) in enumerate(zip(
-                st.session_state['current_question'] if isinstance(st.session_state['current_question'], list) else [st.session_state['current_question']],
+            for i, (answer, evaluation) in enumerate(zip(
                 st.session_state['user_answers'],
                 st.session_state['evaluations']
             )):
-                st.markdown(f"**Question {i+1}:** {question}")
+                st.markdown(f"**Question {i+1}:** {evaluation.question}")
                 st.markdown(f"**Your Answer:** {answer}")
-                st.markdown("**Evaluation:**")
-                st.markdown(evaluation)
+                st.markdown(f"**Score:** {evaluation.score}/10")
+                if evaluation.missing_terms:
+                    st.markdown("**Missing Key Points:** " + ", ".join(evaluation.missing_terms))
                 st.divider()
             
             # Display Q&A section
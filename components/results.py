@@ -1,6 +1,7 @@
 import streamlit as st
 from db_utils import get_interview_responses
-from utils.interview_utils import get_ai_response
+from utils.interview_utils import stream_ai_response
+from utils.evaluation import final_score
 
 def show_results():
     st.markdown("""
@@ -19,16 +20,7 @@ def show_results():
 
     # Calculate overall score
     if st.session_state.get('evaluations'):
-        total_score = 0
-        for evaluation in st.session_state['evaluations']:
-            try:
-                score_line = evaluation.split('\n')[0]
-                score = float(score_line.split(':')[1].split('/')[0].strip())
-                total_score += score
-            except:
-                continue
-
-        avg_score = total_score / len(st.session_state['evaluations'])
+        avg_score = final_score(st.session_state.get('interview_summary'), st.session_state['evaluations'])
 
         # Display score card
         st.markdown(f"""
@@ -52,11 +44,12 @@ def show_results():
             </h3>
         """, unsafe_allow_html=True)
 
-        for i, (question, answer, evaluation) in enumerate(zip(
-            st.session_state['current_question'] if isinstance(st.session_state['current_question'], list) else [st.session_state['current_question']],
+        for i, (answer, evaluation) in enumerate(zip(
             st.session_state['user_answers'],
             st.session_state['evaluations']
         )):
+            covered = ", ".join(evaluation.matched_terms) or "None"
+            missing = ", ".join(evaluation.missing_terms) or "None"
             with st.expander(f"Question {i+1} Details"):
                 st.markdown(f"""
                     <div style='
@@ -66,7 +59,7 @@ def show_results():
                         margin-bottom: 1rem;
                     '>
                         <h4 style='color: var(--brand-primary); margin-bottom: 1rem;'>Question</h4>
-                        <p style='color: var(--neutral-800); font-size: 1.1rem;'>{question}</p>
+                        <p style='color: var(--neutral-800); font-size: 1.1rem;'>{evaluation.question}</p>
 
                         <h4 style='color: var(--brand-primary); margin: 1rem 0;'>Your Answer</h4>
                         <div style='
@@ -85,7 +78,10 @@ def show_results():
                             border-radius: 0.5rem;
                             border: 1px solid var(--neutral-200);
                         '>
-                            <p style='color: var(--neutral-800); white-space: pre-line;'>{evaluation}</p>
+                            <p style='color: var(--neutral-800);'><strong>Score:</strong> {evaluation.score}/10</p>
+                            <p style='color: var(--neutral-800);'><strong>Key Points Covered:</strong> {covered}</p>
+                            <p style='color: var(--neutral-800);'><strong>Missing Key Points:</strong> {missing}</p>
+                            <p style='color: var(--neutral-800);'><strong>Ideal Response:</strong> {evaluation.ideal_answer}</p>
                         </div>
                     </div>
                 """, unsafe_allow_html=True)
@@ -166,31 +162,18 @@ def show_results():
 
             if st.button("🚀 Ask Question", type="primary", use_container_width=True):
                 if question:
-                    with st.spinner("Getting AI response..."):
-                        ai_response = get_ai_response(question)
-                        if 'user_questions' not in st.session_state:
-                            st.session_state['user_questions'] = []
-                        if 'ai_responses' not in st.session_state:
-                            st.session_state['ai_responses'] = []
-                        st.session_state['user_questions'].append(question)
-                        st.session_state['ai_responses'].append(ai_response)
-                        
-                        # Display the current response immediately
-                        st.markdown("""
-                            <div style='
-                                background: var(--neutral-50);
-                                border-radius: 0.75rem;
-                                padding: 1.5rem;
-                                margin: 1rem 0;
-                                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                            '>
-                                <h4 style='color: var(--brand-primary); margin-bottom: 1rem;'>Your Question</h4>
-                                <p style='color: var(--neutral-800);'>{}</p>
-                                <h4 style='color: var(--brand-primary); margin: 1rem 0;'>AI Response</h4>
-                                <p style='color: var(--neutral-800);'>{}</p>
-                            </div>
-                        """.format(question, ai_response), unsafe_allow_html=True)
-                        st.rerun()
+                    st.markdown("""
+                        <h4 style='color: var(--brand-primary); margin: 1rem 0;'>AI Response</h4>
+                    """, unsafe_allow_html=True)
+                    # Render the answer as it streams in
+                    ai_response = st.write_stream(stream_ai_response(question))
+                    if 'user_questions' not in st.session_state:
+                        st.session_state['user_questions'] = []
+                    if 'ai_responses' not in st.session_state:
+                        st.session_state['ai_responses'] = []
+                    st.session_state['user_questions'].append(question)
+                    st.session_state['ai_responses'].append(ai_response)
+                    st.rerun()
                 else:
                     st.error("Please enter a question first!")
         else:
@@ -10,36 +10,3 @@ DB_CONFIG = {
     'host': os.getenv('DB_HOST'),
     'port': os.getenv('DB_PORT')
 }
-
-# Database schema
-CREATE_TABLES = """
-CREATE TABLE IF NOT EXISTS users (
-    id SERIAL PRIMARY KEY,
-    name VARCHAR(50) NOT NULL,
-    email VARCHAR(100) UNIQUE NOT NULL,
-    password_hash VARCHAR(255) NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
-
-CREATE TABLE IF NOT EXISTS interviews (
-    id SERIAL PRIMARY KEY,
-    user_id INTEGER REFERENCES users(id),
-    category VARCHAR(50) NOT NULL,
-    start_time TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    end_time TIMESTAMP WITH TIME ZONE,
-    total_score FLOAT,
-    questions_attempted INTEGER DEFAULT 0
-);
-
-CREATE TABLE IF NOT EXISTS interview_questions (
-    id SERIAL PRIMARY KEY,
-    interview_id INTEGER REFERENCES interviews(id),
-    question_text TEXT NOT NULL,
-    user_answer TEXT,
-    model_answer TEXT,
-    score FLOAT,
-    feedback TEXT,
-    time_taken INTEGER,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-);
-""" 
\ No newline at end of file
@@ -1,248 +1,136 @@
-import os
-from datetime import datetime
-import hashlib
-import psycopg2
-from psycopg2.extras import DictCursor
 from dotenv import load_dotenv
+from migrate import migrate, pending_migrations
+from utils.repository import transaction
+from utils.response_writer import response_writer
 
 # Load environment variables
 load_dotenv()
 
-# Database configuration
-DB_CONFIG = {
-    'dbname': os.getenv('DB_NAME'),
-    'user': os.getenv('DB_USER'),
-    'password': os.getenv('DB_PASSWORD'),
-    'host': os.getenv('DB_HOST'),
-    'port': os.getenv('DB_PORT')
-}
-
-def get_db_connection():
-    """Create a database connection"""
+_schema_checked = False
+
+def init_db():
+    """Make sure the schema is current
+
+    Migrations normally run at deploy time (python migrate.py), so this only
+    checks the recorded version, once per process, and applies whatever is
+    still pending.
+    """
+    global _schema_checked
+    if _schema_checked:
+        return True
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        print("\n" + "="*50)
-        print("DATABASE CONNECTED SUCCESSFULLY!")
-        print("="*50 + "\n")
-        return conn
+        pending = pending_migrations()
+        if pending:
+            print(f"Applying {len(pending)} pending migrations; run python migrate.py when deploying")
+            migrate()
+        _schema_checked = True
+        return True
     except Exception as e:
-        print(f"Error connecting to database: {str(e)}")
-        return None
+        print(f"Error initializing database: {str(e)}")
+        return False
 
-def init_db():
-    """Initialize the database with required tables"""
-    conn = get_db_connection()
-    if conn:
-        try:
-            with conn.cursor() as cur:
-                # Create users table
-                cur.execute('''
-                    CREATE TABLE IF NOT EXISTS users (
-                        id SERIAL PRIMARY KEY,
-                        name VARCHAR(100) NOT NULL,
-                        email VARCHAR(100) UNIQUE NOT NULL,
-                        password_hash VARCHAR(64) NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                # Create interviews table
-                cur.execute('''
-                    CREATE TABLE IF NOT EXISTS interviews (
-                        id SERIAL PRIMARY KEY,
-                        user_id INTEGER NOT NULL REFERENCES users(id),
-                        category VARCHAR(50) NOT NULL,
-                        score DECIMAL,
-                        total_questions INTEGER,
-                        completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                # Create question_responses table
-                cur.execute('''
-                    CREATE TABLE IF NOT EXISTS question_responses (
-                        id SERIAL PRIMARY KEY,
-                        interview_id INTEGER NOT NULL REFERENCES interviews(id),
-                        question TEXT NOT NULL,
-                        user_answer TEXT NOT NULL,
-                        model_answer TEXT NOT NULL,
-                        score DECIMAL NOT NULL,
-                        feedback TEXT,
-                        time_taken INTEGER,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-            conn.commit()
-            print("Database initialized successfully")
-        except Exception as e:
-            print(f"Error initializing database: {str(e)}")
-        finally:
-            conn.close()
-
-def hash_password(password):
-    """Hash a password using SHA-256"""
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def register_user(name, email, password):
-    """Register a new user in the database"""
+def create_interview(user_id, category):
+    """Create a new interview session"""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return None
-        
-        with conn.cursor() as cur:
-            # Check if email already exists
-            cur.execute('SELECT id FROM users WHERE email = %s', (email,))
-            if cur.fetchone():
-                conn.close()
-                return None
-            
-            # Hash password and save user
-            password_hash = hash_password(password)
-            cur.execute('''
-                INSERT INTO users (name, email, password_hash)
-                VALUES (%s, %s, %s)
-                RETURNING id
-            ''', (name, email, password_hash))
-            user_id = cur.fetchone()[0]
-            conn.commit()
-            conn.close()
-            return user_id
+        with transaction() as repo:
+            return repo.interviews.create(user_id, category)
     except Exception as e:
-        print(f"Error registering user: {str(e)}")
+        print(f"Error creating interview: {str(e)}")
         return None
 
-def verify_user(email, password):
-    """Verify user credentials and return user info if valid"""
+def save_question_response(interview_id, user_answer, evaluation, time_taken):
+    """Queue a question response; a background writer saves it in a batch"""
+    response_writer.add(interview_id, user_answer, evaluation, time_taken)
+    return True
+
+def finalize_interview(interview_id):
+    """Save an interview's queued answers and final score in one transaction
+
+    The score and question count are computed from question_responses in
+    the database. Returns the interview summary for the results page
+    ({'id', 'category', 'score', 'total_questions', 'completed_at'}), or
+    None if it could not be saved.
+    """
+    rows = response_writer.take(interview_id)
     try:
-        conn = get_db_connection()
-        if not conn:
-            return None
-        
-        with conn.cursor() as cur:
-            password_hash = hash_password(password)
-            cur.execute('''
-                SELECT id, name FROM users
-                WHERE email = %s AND password_hash = %s
-            ''', (email, password_hash))
-            user = cur.fetchone()
-            conn.close()
-            
-            if user:
-                return {
-                    'id': user[0],
-                    'name': user[1]
-                }
-            return None
+        with transaction() as repo:
+            if rows:
+                repo.responses.create_many(rows)
+            return repo.interviews.finalize(interview_id)
     except Exception as e:
-        print(f"Error verifying user: {str(e)}")
+        print(f"Error finalizing interview: {str(e)}")
+        response_writer.requeue(rows)
         return None
 
-def create_interview(user_id, category):
-    """Create a new interview session"""
-    conn = get_db_connection()
-    if conn:
-        try:
-            with conn.cursor() as cur:
-                cur.execute('''
-                    INSERT INTO interviews (user_id, category)
-                    VALUES (%s, %s)
-                    RETURNING id
-                ''', (user_id, category))
-                
-                interview_id = cur.fetchone()[0]
-                conn.commit()
-                return interview_id
-        except Exception as e:
-            print(f"Error creating interview: {str(e)}")
-            return None
-        finally:
-            conn.close()
-    return None
-
-def save_question_response(interview_id, question, user_answer, model_answer, score, feedback, time_taken):
-    """Save a question response"""
-    conn = get_db_connection()
-    if conn:
-        try:
-            with conn.cursor() as cur:
-                cur.execute('''
-                    INSERT INTO question_responses 
-                    (interview_id, question, user_answer, model_answer, score, feedback, time_taken)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                ''', (interview_id, question, user_answer, model_answer, score, feedback, time_taken))
-                
-                conn.commit()
-                return True
-        except Exception as e:
-            print(f"Error saving question response: {str(e)}")
-            return False
-        finally:
-            conn.close()
-    return False
-
-def update_interview_score(interview_id, score, total_questions):
-    """Update interview score and completion status"""
-    conn = get_db_connection()
-    if conn:
-        try:
-            with conn.cursor() as cur:
-                cur.execute('''
-                    UPDATE interviews 
-                    SET score = %s, total_questions = %s, completed_at = CURRENT_TIMESTAMP
-                    WHERE id = %s
-                ''', (score, total_questions, interview_id))
-                
-                conn.commit()
-                return True
-        except Exception as e:
-            print(f"Error updating interview score: {str(e)}")
-            return False
-        finally:
-            conn.close()
-    return False
-
 def get_user_interviews(user_id):
     """Get all interviews for a user"""
-    conn = get_db_connection()
-    if conn:
-        try:
-            with conn.cursor(cursor_factory=DictCursor) as cur:
-                cur.execute('''
-                    SELECT id, category, score, total_questions, completed_at
-                    FROM interviews
-                    WHERE user_id = %s
-                    ORDER BY completed_at DESC
-                ''', (user_id,))
-                
-                interviews = cur.fetchall()
-                return [dict(i) for i in interviews]
-        except Exception as e:
-            print(f"Error getting user interviews: {str(e)}")
-            return []
-        finally:
-            conn.close()
-    return []
+    try:
+        with transaction() as repo:
+            return repo.interviews.for_user(user_id)
+    except Exception as e:
+        print(f"Error getting user interviews: {str(e)}")
+        return []
 
 def get_interview_responses(interview_id):
     """Get all responses for an interview"""
-    conn = get_db_connection()
-    if conn:
-        try:
-            with conn.cursor(cursor_factory=DictCursor) as cur:
-                cur.execute('''
-                    SELECT question, user_answer, model_answer, score, feedback, time_taken
-                    FROM question_responses
-                    WHERE interview_id = %s
-                    ORDER BY created_at ASC
-                ''', (interview_id,))
-                
-                responses = cur.fetchall()
-                return [dict(r) for r in responses]
-        except Exception as e:
-            print(f"Error getting interview responses: {str(e)}")
-            return []
-        finally:
-            conn.close()
-    return [] 
\ No newline at end of file
+    try:
+        with transaction() as repo:
+            return repo.responses.for_interview(interview_id)
+    except Exception as e:
+        print(f"Error getting interview responses: {str(e)}")
+        return []
+
+def get_user_stats(user_id):
+    """Get statistics for a user"""
+    try:
+        with transaction() as repo:
+            return repo.stats.for_user(user_id)
+    except Exception as e:
+        print(f"Error getting user stats: {str(e)}")
+        return {
+            'total_interviews': 0,
+            'average_score': 0,
+            'best_score': 0,
+            'worst_score': 0
+        }
+
+def get_seen_questions(user_id):
+    """Get the bitmap of question row ids a user has already been asked
+
+    Returns b'' for a user with no saved bitmap and None if it could not be read.
+    """
+    try:
+        with transaction() as repo:
+            return repo.users.seen_questions(user_id)
+    except Exception as e:
+        print(f"Error getting seen questions: {str(e)}")
+        return None
+
+def save_seen_questions(user_id, seen):
+    """Save the bitmap of question row ids a user has already been asked"""
+    try:
+        with transaction() as repo:
+            repo.users.save_seen_questions(user_id, seen)
+        return True
+    except Exception as e:
+        print(f"Error saving seen questions: {str(e)}")
+        return False
+
+def save_llm_calls(calls):
+    """Save a batch of LLM call records in one round trip"""
+    try:
+        with transaction() as repo:
+            repo.stats.save_llm_calls(calls)
+        return True
+    except Exception as e:
+        print(f"Error saving LLM calls: {str(e)}")
+        return False
+
+def get_user_token_usage(user_id, since):
+    """Get the prompt plus completion tokens a user has spent since a timestamp"""
+    try:
+        with transaction() as repo:
+            return repo.stats.token_usage(user_id, since)
+    except Exception as e:
+        print(f"Error getting token usage: {str(e)}")
+        return None
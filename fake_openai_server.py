@@ -0,0 +1,197 @@
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def parse_latency(spec):
+    """Build a latency sampler from 'fixed:S', 'uniform:LO,HI' or 'lognormal:MU,SIGMA' (seconds)"""
+    kind, _, args = spec.partition(':')
+    values = [float(v) for v in args.split(',')] if args else []
+    if kind == 'fixed':
+        return lambda rng: values[0]
+    if kind == 'uniform':
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == 'lognormal':
+        return lambda rng: rng.lognormvariate(values[0], values[1])
+    raise argparse.ArgumentTypeError(f"Unknown latency distribution: {spec}")
+
+def count_tokens(text):
+    """Rough token count, good enough for usage accounting in tests"""
+    return max(1, len(text.split()) * 4 // 3)
+
+OPENERS = ["So, let's talk about this:", "I'd like to hear your take:", "Walk me through this:"]
+
+def fake_completion(prompt, index=0):
+    """Deterministic reply for a prompt; rephrasing prompts echo the question back"""
+    if 'Questions (JSON):' in prompt:
+        questions = json.loads(prompt.split('Questions (JSON):', 1)[1])
+        opener = OPENERS[index % len(OPENERS)]
+        return json.dumps([{'id': q['id'], 'rephrased': f"{opener} {q['question']}"} for q in questions])
+    if 'Original:' in prompt:
+        question = prompt.split('Original:', 1)[1].split('\n', 1)[0].strip()
+        return f"{OPENERS[index % len(OPENERS)]} {question}"
+    digest = hashlib.sha1(f"{prompt}|{index}".encode('utf-8')).hexdigest()[:8]
+    topic = prompt.rsplit(':', 1)[-1].strip()
+    return (f"Here is how an experienced data scientist would answer {topic!r}. "
+            f"Start from the definition, explain the intuition, give a concrete example "
+            f"and mention the common pitfalls. [{digest}]")
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message, headers=None):
+        self._send_json(status, {'error': {'message': message, 'type': 'fake_error', 'code': status}}, headers)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._error(404, f"Unknown path {self.path}")
+            return
+
+        fault, latency = self.server.draw()
+        if fault == 'timeout':
+            time.sleep(self.server.hang)
+            self._error(504, "Injected timeout")
+            return
+        time.sleep(latency)
+        if fault == 'rate_limit':
+            self._error(429, "Injected rate limit", {'Retry-After': '1'})
+            return
+        if fault == 'server_error':
+            self._error(500, "Injected server error")
+            return
+
+        prompt = "\n".join(m.get('content', '') for m in request.get('messages', []))
+        n = int(request.get('n') or 1)
+        texts = [fake_completion(prompt, i) for i in range(n)]
+        completion_id = f"chatcmpl-fake-{self.server.next_id()}"
+        model = request.get('model', 'fake-model')
+        prompt_tokens = count_tokens(prompt)
+        completion_tokens = sum(count_tokens(t) for t in texts)
+        usage = {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        }
+        if request.get('stream'):
+            include_usage = (request.get('stream_options') or {}).get('include_usage')
+            self._stream(completion_id, model, texts, usage if include_usage else None)
+            return
+
+        self._send_json(200, {
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [
+                {'index': i, 'message': {'role': 'assistant', 'content': t}, 'finish_reason': 'stop'}
+                for i, t in enumerate(texts)
+            ],
+            'usage': usage
+        })
+
+    def _stream(self, completion_id, model, texts, usage=None):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        def send(choices, **extra):
+            chunk = {'id': completion_id, 'object': 'chat.completion.chunk',
+                     'created': int(time.time()), 'model': model, 'choices': choices, **extra}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        for i, text in enumerate(texts):
+            send([{'index': i, 'delta': {'role': 'assistant', 'content': ''}, 'finish_reason': None}])
+            for word in text.split(' '):
+                time.sleep(self.server.token_delay)
+                send([{'index': i, 'delta': {'content': word + ' '}, 'finish_reason': None}])
+            send([{'index': i, 'delta': {}, 'finish_reason': 'stop'}])
+        if usage is not None:
+            send([], usage=usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """Chat-completions stand-in with injected latency and failures"""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency='fixed:0', rate_limit=0.0, server_error=0.0,
+                 timeout=0.0, hang=60.0, token_delay=0.0, seed=0, verbose=False):
+        super().__init__(address, FakeOpenAIHandler)
+        self.latency = parse_latency(latency)
+        self.rate_limit = rate_limit
+        self.server_error = server_error
+        self.timeout = timeout
+        self.hang = hang
+        self.token_delay = token_delay
+        self.verbose = verbose
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._requests = 0
+
+    def draw(self):
+        """Pick the next request's injected fault (or None) and latency"""
+        with self._lock:
+            roll = self._rng.random()
+            latency = max(0.0, self.latency(self._rng))
+        if roll < self.timeout:
+            return 'timeout', latency
+        if roll < self.timeout + self.rate_limit:
+            return 'rate_limit', latency
+        if roll < self.timeout + self.rate_limit + self.server_error:
+            return 'server_error', latency
+        return None, latency
+
+    def next_id(self):
+        with self._lock:
+            self._requests += 1
+            return self._requests
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible chat-completions server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', default='fixed:0',
+                        help="response latency: fixed:S, uniform:LO,HI or lognormal:MU,SIGMA")
+    parser.add_argument('--rate-limit', type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument('--server-error', type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument('--timeout', type=float, default=0.0, help="fraction of requests that hang")
+    parser.add_argument('--hang', type=float, default=60.0, help="seconds a hanging request stalls")
+    parser.add_argument('--token-delay', type=float, default=0.0, help="seconds between streamed tokens")
+    parser.add_argument('--seed', type=int, default=0, help="seed for latency and fault injection")
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(
+        (args.host, args.port), args.latency, args.rate_limit, args.server_error,
+        args.timeout, args.hang, args.token_delay, args.seed, args.verbose
+    )
+    print(f"Fake OpenAI server on http://{args.host}:{args.port}/v1")
+    print(f"Point the app at it with OPENAI_BASE_URL=http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
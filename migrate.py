@@ -0,0 +1,170 @@
+import argparse
+import sys
+from utils.db_pool import db_connection
+
+# Forward-only schema migrations, applied in order and recorded in
+# schema_migrations. Never edit a migration that has shipped; add a new one.
+MIGRATIONS = [
+    (1, 'baseline schema', [
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            email VARCHAR(100) UNIQUE NOT NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # Salted hashes are longer than the 64 characters older databases allowed
+        'ALTER TABLE users ALTER COLUMN password_hash TYPE VARCHAR(255)',
+        '''
+        CREATE TABLE IF NOT EXISTS interviews (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users(id),
+            category VARCHAR(50) NOT NULL,
+            score DECIMAL,
+            total_questions INTEGER,
+            completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS question_responses (
+            id SERIAL PRIMARY KEY,
+            interview_id INTEGER NOT NULL REFERENCES interviews(id),
+            question TEXT NOT NULL,
+            user_answer TEXT NOT NULL,
+            model_answer TEXT NOT NULL,
+            score DECIMAL NOT NULL,
+            feedback TEXT,
+            matched_terms TEXT[],
+            missing_terms TEXT[],
+            scoring_ms REAL,
+            time_taken INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # Structured evaluation columns for databases created before they existed
+        '''
+        ALTER TABLE question_responses
+            ADD COLUMN IF NOT EXISTS matched_terms TEXT[],
+            ADD COLUMN IF NOT EXISTS missing_terms TEXT[],
+            ADD COLUMN IF NOT EXISTS scoring_ms REAL
+        ''',
+        # Bitmap over question row ids
+        '''
+        CREATE TABLE IF NOT EXISTS user_seen_questions (
+            user_id INTEGER PRIMARY KEY REFERENCES users(id),
+            seen BYTEA NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # One row per model call or cache hit
+        '''
+        CREATE TABLE IF NOT EXISTS llm_calls (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id),
+            interview_id INTEGER REFERENCES interviews(id),
+            call_site VARCHAR(50) NOT NULL,
+            model VARCHAR(50) NOT NULL,
+            prompt_tokens INTEGER,
+            completion_tokens INTEGER,
+            latency_ms INTEGER NOT NULL,
+            ttft_ms INTEGER,
+            cache VARCHAR(10) NOT NULL,
+            outcome VARCHAR(30) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        '''
+    ]),
+    (2, 'indexes for history, responses and token usage', [
+        # History list and per-user stats
+        '''
+        CREATE INDEX IF NOT EXISTS interviews_user_completed_idx
+            ON interviews (user_id, completed_at DESC)
+        ''',
+        # Responses of an interview in answer order
+        '''
+        CREATE INDEX IF NOT EXISTS question_responses_interview_created_idx
+            ON question_responses (interview_id, created_at)
+        ''',
+        # Daily token budget lookup
+        '''
+        CREATE INDEX IF NOT EXISTS llm_calls_user_created_idx
+            ON llm_calls (user_id, created_at)
+        '''
+    ])
+]
+
+# Advisory lock key held while migrating, so concurrent deploys take turns
+MIGRATION_LOCK = 4210427
+
+def latest_version():
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+def applied_versions():
+    """Versions recorded in schema_migrations; empty before the first migration"""
+    with db_connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+        if not cur.fetchone()[0]:
+            return set()
+        cur.execute('SELECT version FROM schema_migrations')
+        return {row[0] for row in cur.fetchall()}
+
+def pending_migrations():
+    applied = applied_versions()
+    return [m for m in MIGRATIONS if m[0] not in applied]
+
+def migrate():
+    """Apply every pending migration, each in its own transaction
+
+    Safe to run repeatedly and from several processes at once: a migration
+    that is already recorded is skipped. Returns the versions applied.
+    """
+    applied = []
+    with db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute('SELECT pg_advisory_xact_lock(%s)', (MIGRATION_LOCK,))
+            cur.execute('''
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+        conn.commit()
+
+        for version, name, statements in MIGRATIONS:
+            with conn.cursor() as cur:
+                cur.execute('SELECT pg_advisory_xact_lock(%s)', (MIGRATION_LOCK,))
+                cur.execute('SELECT 1 FROM schema_migrations WHERE version = %s', (version,))
+                if cur.fetchone():
+                    conn.rollback()
+                    continue
+                for statement in statements:
+                    cur.execute(statement)
+                cur.execute('''
+                    INSERT INTO schema_migrations (version, name)
+                    VALUES (%s, %s)
+                ''', (version, name))
+            conn.commit()
+            applied.append(version)
+            print(f"Applied migration {version}: {name}")
+    return applied
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply pending database schema migrations")
+    parser.add_argument('--status', action='store_true', help="only list pending migrations")
+    args = parser.parse_args()
+
+    try:
+        if args.status:
+            pending = pending_migrations()
+            for version, name, _ in pending:
+                print(f"Pending migration {version}: {name}")
+            print(f"{len(pending)} of {len(MIGRATIONS)} migrations pending")
+        else:
+            applied = migrate()
+            print(f"✅ Schema is at version {latest_version()} ({len(applied)} migrations applied)")
+    except Exception as e:
+        print(f"❌ Error migrating database: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,91 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+load_dotenv()
+
+from utils.interview_utils import (
+    REPHRASE_BATCH_SIZE, REPHRASE_PROMPT_VERSION, generate_batch_rephrasings, generate_rephrasings
+)
+from utils.question_bank import get_question_bank
+from utils.rephrasings import question_id, rephrasing_store
+
+def rephrase_one(question, qid, missing):
+    """Generate and store the missing variants of one question"""
+    variants = generate_rephrasings(question, n=missing)
+    rephrasing_store.add(qid, REPHRASE_PROMPT_VERSION, variants)
+    return len(variants)
+
+def rephrase_batch(items):
+    """Generate and store the missing variants of several questions in one completion
+
+    Questions the batched reply does not fully cover are topped up one by one.
+    """
+    try:
+        batch = generate_batch_rephrasings(
+            [question for _, question, _ in items],
+            n=max(missing for _, _, missing in items)
+        )
+    except Exception as e:
+        print(f"Error rephrasing question batch: {str(e)}")
+        batch = [[] for _ in items]
+    for (qid, question, missing), variants in zip(items, batch):
+        variants = variants[:missing]
+        if len(variants) < missing:
+            variants += generate_rephrasings(question, n=missing - len(variants))
+        rephrasing_store.add(qid, REPHRASE_PROMPT_VERSION, variants)
+    return len(items)
+
+def prerephrase(variants=3, concurrency=4, category="All", limit=None, batch_size=REPHRASE_BATCH_SIZE):
+    """Fill the rephrasing store so the app never calls the model for a known question
+
+    Every finished question is committed on its own, so the job can be
+    interrupted and re-run; questions that already have enough variants for
+    the current prompt version are skipped. Up to `batch_size` questions are
+    rephrased per completion.
+    """
+    bank = get_question_bank()
+    if bank is None:
+        return False
+
+    pending = {}
+    for row_id in bank.row_ids(category):
+        question = bank.questions[row_id]
+        qid = question_id(question)
+        if qid in pending:
+            continue
+        missing = variants - rephrasing_store.count(qid, REPHRASE_PROMPT_VERSION)
+        if missing > 0:
+            pending[qid] = (question, missing)
+    todo = list(pending.items())[:limit]
+    print(f"{len(todo)} questions need rephrasing (prompt version {REPHRASE_PROMPT_VERSION})")
+
+    batches = [
+        [(qid, question, missing) for qid, (question, missing) in todo[start:start + batch_size]]
+        for start in range(0, len(todo), max(1, batch_size))
+    ]
+    done = failed = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(rephrase_batch, items): items for items in batches}
+        for future in as_completed(futures):
+            items = futures[future]
+            try:
+                future.result()
+                done += len(items)
+            except Exception as e:
+                failed += len(items)
+                print(f"Error rephrasing {items[0][0]} and {len(items) - 1} more: {str(e)}")
+            print(f"{done + failed}/{len(todo)} questions processed")
+
+    print(f"Rephrased {done} questions, {failed} failed")
+    return failed == 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate conversational variants of every question")
+    parser.add_argument('--variants', type=int, default=3, help="variants to keep per question")
+    parser.add_argument('--concurrency', type=int, default=4, help="parallel model requests")
+    parser.add_argument('--category', default="All", help="only rephrase one category")
+    parser.add_argument('--limit', type=int, help="stop after this many questions")
+    parser.add_argument('--batch-size', type=int, default=REPHRASE_BATCH_SIZE,
+                        help="questions rephrased per model request")
+    args = parser.parse_args()
+    prerephrase(args.variants, args.concurrency, args.category, args.limit, args.batch_size)
@@ -1,4 +1,5 @@
-from db_utils import get_db_connection, init_db
+from db_utils import init_db
+from utils.db_pool import db_connection
 import psycopg2
 from psycopg2.extras import DictCursor
 
@@ -7,11 +8,10 @@ def test_connection():
     print("Testing database connection...")
     
     # Test basic connection
-    conn = get_db_connection()
-    if conn:
-        print("✅ Successfully connected to database")
-        
-        try:
+    try:
+        with db_connection() as conn:
+            print("✅ Successfully connected to database")
+            
             # Initialize database (create tables)
             init_db()
             print("✅ Database tables initialized")
@@ -93,14 +93,9 @@ def test_connection():
                     print(f"❌ Error during test data operations: {str(e)}")
                 
             conn.commit()
-            
-        except Exception as e:
-            print(f"❌ Error during database operations: {str(e)}")
-        finally:
-            conn.close()
-            print("✅ Database connection closed")
-    else:
-        print("❌ Failed to connect to database")
+        print("✅ Database connection returned to the pool")
+    except Exception as e:
+        print(f"❌ Error during database operations: {str(e)}")
 
 if __name__ == "__main__":
     test_connection() 
\ No newline at end of file
@@ -0,0 +1,196 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from utils.file_utils import write_atomic
+from utils.key_terms import KeyTermIndex
+from utils.question_bank import get_question_bank, on_reload
+
+SCORER_PATH = Path(os.getenv(
+    'SCORER_PATH',
+    Path(__file__).parent.parent / 'data' / 'answer_scorer.joblib'
+))
+SCORER_FORMAT = 2
+
+def answers_digest(answers):
+    """SHA-256 over the ideal answers, in row order"""
+    digest = hashlib.sha256()
+    for answer in answers:
+        digest.update(answer.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+class AnswerIndex:
+    """Lookup from ideal answer text to its row id, shared by the scorers"""
+
+    def index_answers(self, answers):
+        """Remember which row id each ideal answer text belongs to"""
+        rows = {}
+        for row_id, answer in enumerate(answers):
+            rows.setdefault(answer, row_id)
+        self._rows_by_answer = rows
+
+    def row_for_answer(self, ideal_answer):
+        return self._rows_by_answer.get(ideal_answer)
+
+class TfidfScorer(AnswerIndex):
+    """TF-IDF model fitted once over every ideal answer in the question bank.
+
+    Row i of `ideal_matrix` is the L2-normalized vector of row id i's ideal
+    answer, so scoring an answer is one transform plus one sparse dot product.
+    `key_terms` holds each ideal answer's ranked key terms for feedback.
+    """
+
+    def __init__(self, vectorizer, ideal_matrix, key_terms, digest):
+        self.vectorizer = vectorizer
+        self.ideal_matrix = ideal_matrix
+        self.key_terms = key_terms
+        self.digest = digest
+        self._rows_by_answer = {}
+
+    @classmethod
+    def fit(cls, answers):
+        answers = list(answers)
+        vectorizer = TfidfVectorizer(dtype=np.float32)
+        ideal_matrix = vectorizer.fit_transform(answers).tocsr()
+        return cls(vectorizer, ideal_matrix, KeyTermIndex.build(answers), answers_digest(answers))
+
+    @classmethod
+    def load(cls, path=SCORER_PATH):
+        state = joblib.load(path)
+        if state.get('format') != SCORER_FORMAT:
+            raise ValueError(f"Unsupported scorer format in {path}")
+        return cls(state['vectorizer'], state['ideal_matrix'], state['key_terms'], state['digest'])
+
+    def save(self, path=SCORER_PATH):
+        write_atomic(path, lambda f: joblib.dump({
+            'format': SCORER_FORMAT,
+            'digest': self.digest,
+            'vectorizer': self.vectorizer,
+            'ideal_matrix': self.ideal_matrix,
+            'key_terms': self.key_terms
+        }, f))
+
+    def transform(self, texts):
+        """L2-normalized TF-IDF vectors of texts in the fitted vocabulary"""
+        return self.vectorizer.transform(texts)
+
+    def similarity(self, user_answer, ideal_answer):
+        """Cosine similarity between an answer and an ideal answer
+
+        Ideal answers from the bank use their precomputed row; any other text
+        is transformed with the same fitted vocabulary and IDF.
+        """
+        vector = self.transform([user_answer])
+        row_id = self.row_for_answer(ideal_answer)
+        if row_id is not None:
+            ideal = self.ideal_matrix[row_id]
+        else:
+            ideal = self.transform([ideal_answer])
+        return float(ideal.multiply(vector).sum())
+
+    def _pairs(self, user_answers, row_ids):
+        users = self.transform(user_answers)
+        ideals = self.ideal_matrix[np.asarray(row_ids, dtype=np.intp)]
+        return users, ideals
+
+    def score_rows(self, user_answers, row_ids):
+        """Cosine similarity of each answer to the ideal answer of its row id
+
+        All pairs are scored in one sparse element-wise product.
+        """
+        users, ideals = self._pairs(user_answers, row_ids)
+        return np.asarray(users.multiply(ideals).sum(axis=1), dtype=np.float32).ravel()
+
+    def key_term_diff(self, user_answer, ideal_answer, top=3):
+        """Most important key terms of the ideal answer the user covered and missed"""
+        row_id = self.row_for_answer(ideal_answer)
+        return self.key_terms.diff(user_answer, row_id, ideal_answer, top)
+
+    def keyword_diffs(self, user_answers, row_ids, top=3):
+        """key_term_diff for many answers, as two lists of term lists"""
+        return self.key_terms.diff_rows(user_answers, row_ids, top)
+
+def fit_answer_scorer(bank, path=SCORER_PATH):
+    """Fit a scorer over a bank's ideal answers and save it"""
+    scorer = TfidfScorer.fit(bank.answers)
+    scorer.save(path)
+    return scorer
+
+def load_answer_scorer(bank, path=SCORER_PATH):
+    """Load the saved scorer if it was fitted on this bank's answers, else refit it"""
+    digest = answers_digest(bank.answers)
+    scorer = None
+    if Path(path).exists():
+        try:
+            scorer = TfidfScorer.load(path)
+        except Exception as e:
+            print(f"Ignoring saved answer scorer: {str(e)}")
+    if scorer is None or scorer.digest != digest:
+        scorer = TfidfScorer.fit(bank.answers)
+        try:
+            scorer.save(path)
+        except OSError as e:
+            print(f"Error saving answer scorer: {str(e)}")
+    scorer.index_answers(bank.answers)
+    return scorer
+
+def _load_embedding_scorer(bank):
+    from utils.embedding_scorer import load_embedding_scorer
+    return load_embedding_scorer(bank)
+
+def _load_hashing_scorer(bank):
+    from utils.embedding_scorer import EMBEDDINGS_PATH, HashingEncoder, load_embedding_scorer
+    path = EMBEDDINGS_PATH.with_name(EMBEDDINGS_PATH.stem + '_hashing.npy')
+    return load_embedding_scorer(bank, HashingEncoder(), path)
+
+# Scorer backends by name. A loader takes the question bank and returns an
+# object with similarity(user_answer, ideal_answer) and
+# score_rows(user_answers, row_ids).
+SCORER_BACKENDS = {
+    'tfidf': load_answer_scorer,
+    'embedding': _load_embedding_scorer,
+    'hashing': _load_hashing_scorer
+}
+SCORER_BACKEND = os.getenv('SCORER_BACKEND', 'tfidf')
+
+def register_scorer_backend(name, loader):
+    """Make a scorer backend available to get_answer_scorer under a name"""
+    SCORER_BACKENDS[name] = loader
+
+_scorers = {}
+_scorer_lock = threading.Lock()
+
+@on_reload
+def _reset_scorers(bank):
+    # A fitted TF-IDF model depends on every answer, so it is reloaded (and
+    # refitted if needed) on next use. Scorers with updated(bank), such as
+    # the embedding scorer, re-encode only the bank's changed rows.
+    with _scorer_lock:
+        for backend, scorer in list(_scorers.items()):
+            del _scorers[backend]
+            if hasattr(scorer, 'updated'):
+                try:
+                    _scorers[backend] = scorer.updated(bank)
+                except Exception as e:
+                    print(f"Error updating {backend} scorer: {str(e)}")
+
+def get_answer_scorer(backend=None):
+    """Return the process-wide scorer of a backend, loading it on first use
+
+    Defaults to the SCORER_BACKEND setting.
+    """
+    backend = backend or SCORER_BACKEND
+    scorer = _scorers.get(backend)
+    if scorer is not None:
+        return scorer
+    bank = get_question_bank()
+    if bank is None:
+        return None
+    with _scorer_lock:
+        if backend not in _scorers:
+            _scorers[backend] = SCORER_BACKENDS[backend](bank)
+        return _scorers[backend]
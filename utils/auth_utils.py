@@ -2,7 +2,7 @@ import streamlit as st
 import hashlib
 import secrets
 import time
-from db_utils import get_db_connection
+from utils.repository import transaction
 
 def generate_session_token(user_id, name):
     """Generate a session token with expiration time"""
@@ -33,52 +33,33 @@ def verify_password(stored_password, provided_password):
 def register(first_name, last_name, email, password):
     """Register a new user in PostgreSQL"""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return False, "Could not connect to database."
-        with conn.cursor() as cur:
-            # Check if email already exists
-            cur.execute('SELECT id FROM users WHERE email = %s', (email,))
-            if cur.fetchone():
-                conn.close()
-                return False, "Email already exists"
-            # Concatenate first_name and last_name into a single 'name' column
-            name = f"{first_name} {last_name}"
-            # Hash password and save user
-            password_hash = hash_password(password)
-            cur.execute('''
-                INSERT INTO users (name, email, password_hash)
-                VALUES (%s, %s, %s)
-                RETURNING id
-            ''', (name, email, password_hash))
-            conn.commit()
-            conn.close()
-            return True, "Registration successful"
+        # Concatenate first_name and last_name into a single 'name' column
+        name = f"{first_name} {last_name}"
+        with transaction() as repo:
+            # One round trip: the insert is skipped if the email already exists
+            user_id = repo.users.create(name, email, hash_password(password))
+        if user_id is None:
+            return False, "Email already exists"
+        return True, "Registration successful"
     except Exception as e:
         return False, f"Error during registration: {str(e)}"
 
 def login(email, password):
     """Login a user from PostgreSQL"""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return False, "Could not connect to database."
-        with conn.cursor() as cur:
-            cur.execute('SELECT id, password_hash, name FROM users WHERE email = %s', (email,))
-            user = cur.fetchone()
-            conn.close()
-            if not user:
-                return False, "User not found"
-            user_id, stored_password, full_name = user
-            if verify_password(stored_password, password):
-                # Generate session token and set expiration
-                token, expiration = generate_session_token(user_id, full_name)
-                st.session_state['session_token'] = token
-                st.session_state['session_expiration'] = expiration
-                st.session_state['name'] = full_name
-                return True, user_id
-            else:
-                return False, "Invalid password"
+        with transaction() as repo:
+            user = repo.users.by_email(email)
+        if not user:
+            return False, "User not found"
+        if verify_password(user['password_hash'], password):
+            # Generate session token and set expiration
+            token, expiration = generate_session_token(user['id'], user['name'])
+            st.session_state['session_token'] = token
+            st.session_state['session_expiration'] = expiration
+            st.session_state['name'] = user['name']
+            return True, user['id']
+        else:
+            return False, "Invalid password"
     except Exception as e:
         return False, f"Error during login: {str(e)}"
 
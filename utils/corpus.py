@@ -0,0 +1,171 @@
+"""Compiled question corpus format.
+
+The corpus is a single little-endian file that can be memory-mapped and read
+without parsing:
+
+    header          magic, version, row/type/category counts, names size,
+                    SHA-256 of the source CSV
+    names           u16 length + UTF-8 bytes for every Type, then Category
+    type_ids        u16 per row
+    category_ids    u16 per row
+    offsets         u32 * (2 * rows + 1), question i spans
+                    offsets[2i]:offsets[2i+1] of the blob and its answer
+                    offsets[2i+1]:offsets[2i+2]
+    blob            UTF-8 question and answer text, back to back
+"""
+import mmap
+import struct
+import sys
+from array import array
+from utils.file_utils import write_atomic
+
+MAGIC = b'QBNK'
+VERSION = 1
+_HEADER = struct.Struct('<4sHHIHHI32s')
+_NAME_LEN = struct.Struct('<H')
+
+class CorpusError(Exception):
+    """Raised when a corpus file is missing, truncated or of the wrong version"""
+
+def _align(offset, size=4):
+    return (offset + size - 1) // size * size
+
+def _layout(n_rows, names_size):
+    """Return the byte offsets of the fixed-size sections"""
+    type_ids = _align(_HEADER.size + names_size)
+    category_ids = type_ids + 2 * n_rows
+    offsets = _align(category_ids + 2 * n_rows)
+    blob = offsets + 4 * (2 * n_rows + 1)
+    return type_ids, category_ids, offsets, blob
+
+def _u16(values):
+    out = array('H', values)
+    if sys.byteorder == 'big':
+        out.byteswap()
+    return out
+
+def _u32(values):
+    out = array('I', values)
+    if sys.byteorder == 'big':
+        out.byteswap()
+    return out
+
+def _view(buf, typecode):
+    """Typed, zero-copy view of little-endian data where the host allows it"""
+    if sys.byteorder == 'little':
+        return buf.cast(typecode)
+    out = array(typecode, buf.tobytes())
+    out.byteswap()
+    return out
+
+def write_corpus(path, type_names, category_names, type_ids, category_ids,
+                 questions, answers, source_digest=b''):
+    """Write a corpus file atomically"""
+    n_rows = len(questions)
+    names = bytearray()
+    for name in list(type_names) + list(category_names):
+        encoded = name.encode('utf-8')
+        names += _NAME_LEN.pack(len(encoded)) + encoded
+
+    blob = bytearray()
+    offsets = [0]
+    for question, answer in zip(questions, answers):
+        blob += question.encode('utf-8')
+        offsets.append(len(blob))
+        blob += answer.encode('utf-8')
+        offsets.append(len(blob))
+
+    type_pos, category_pos, offsets_pos, blob_pos = _layout(n_rows, len(names))
+    header = _HEADER.pack(MAGIC, VERSION, 0, n_rows, len(type_names),
+                          len(category_names), len(names),
+                          source_digest.ljust(32, b'\0'))
+
+    def write(f):
+        f.write(header)
+        f.write(names)
+        f.write(b'\0' * (type_pos - f.tell()))
+        f.write(_u16(type_ids).tobytes())
+        f.write(_u16(category_ids).tobytes())
+        f.write(b'\0' * (offsets_pos - f.tell()))
+        f.write(_u32(offsets).tobytes())
+        f.write(blob)
+
+    # Write next to the target and rename, so processes that still map the
+    # previous file keep reading a consistent copy
+    write_atomic(path, write)
+
+class _TextColumn:
+    """Sequence of strings decoded on access from the corpus blob"""
+
+    def __init__(self, blob, offsets, parity):
+        self._blob = blob
+        self._offsets = offsets
+        self._parity = parity
+
+    def __len__(self):
+        return (len(self._offsets) - 1) // 2
+
+    def __getitem__(self, row_id):
+        if not 0 <= row_id < len(self):
+            raise IndexError(row_id)
+        i = 2 * row_id + self._parity
+        return str(self._blob[self._offsets[i]:self._offsets[i + 1]], 'utf-8')
+
+    def __iter__(self):
+        for row_id in range(len(self)):
+            yield self[row_id]
+
+class Corpus:
+    """Memory-mapped, read-only corpus file"""
+
+    def __init__(self, path):
+        # Anything unreadable, such as an empty file mmap refuses, a header
+        # that does not unpack or a name that is not UTF-8, is a CorpusError
+        # so callers can fall back to the CSV
+        try:
+            self._open(path)
+        except CorpusError:
+            raise
+        except (OSError, ValueError, struct.error) as e:
+            raise CorpusError(f"{path} could not be read: {str(e)}") from e
+
+    def _open(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mmap)
+        if len(buf) < _HEADER.size:
+            raise CorpusError(f"{path} is too small to be a corpus")
+
+        (magic, version, _, n_rows, n_types, n_categories, names_size,
+         digest) = _HEADER.unpack_from(buf)
+        if magic != MAGIC:
+            raise CorpusError(f"{path} is not a question corpus")
+        if version != VERSION:
+            raise CorpusError(f"{path} has corpus version {version}, expected {VERSION}")
+
+        type_pos, category_pos, offsets_pos, blob_pos = _layout(n_rows, names_size)
+        if len(buf) < blob_pos:
+            raise CorpusError(f"{path} is truncated")
+
+        names = []
+        pos = _HEADER.size
+        for _ in range(n_types + n_categories):
+            (length,) = _NAME_LEN.unpack_from(buf, pos)
+            pos += _NAME_LEN.size
+            names.append(str(buf[pos:pos + length], 'utf-8'))
+            pos += length
+
+        self.source_digest = digest
+        self.type_names = tuple(names[:n_types])
+        self.category_names = tuple(names[n_types:])
+        self.type_ids = _view(buf[type_pos:type_pos + 2 * n_rows], 'H')
+        self.category_ids = _view(buf[category_pos:category_pos + 2 * n_rows], 'H')
+        offsets = _view(buf[offsets_pos:blob_pos], 'I')
+        if blob_pos + offsets[-1] > len(buf):
+            raise CorpusError(f"{path} is truncated")
+        blob = buf[blob_pos:]
+        self.questions = _TextColumn(blob, offsets, 0)
+        self.answers = _TextColumn(blob, offsets, 1)
+
+    def __len__(self):
+        return len(self.questions)
@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+import psycopg2
+from psycopg2 import extensions, pool
+from db_config import DB_CONFIG
+
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', '1'))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '10'))
+# Seconds to wait for a free connection before giving up
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+# Connections idle for longer than this are checked with a round trip before use
+DB_POOL_VALIDATE_AFTER = float(os.getenv('DB_POOL_VALIDATE_AFTER', '30'))
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection frees up in time"""
+
+class PooledConnection(extensions.connection):
+    """Connection that remembers the statements prepared on its session"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+class ConnectionPool:
+    """Thread-safe Postgres connection pool shared by every session.
+
+    Holds between `minconn` and `maxconn` open connections. Checkouts beyond
+    `maxconn` wait up to `timeout` seconds for a connection to be returned.
+    A connection that has sat idle for a while is validated before it is
+    handed out, and broken ones are replaced.
+    """
+
+    def __init__(self, minconn=DB_POOL_MIN, maxconn=DB_POOL_MAX, timeout=DB_POOL_TIMEOUT,
+                 validate_after=DB_POOL_VALIDATE_AFTER, **config):
+        self.timeout = timeout
+        self.validate_after = validate_after
+        config.setdefault('connection_factory', PooledConnection)
+        self._pool = pool.ThreadedConnectionPool(minconn, maxconn, **config)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._last_used = {}
+
+    def _validate(self, conn):
+        if conn.closed:
+            return False
+        if time.monotonic() - self._last_used.get(id(conn), 0.0) < self.validate_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute('SELECT 1')
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def checkout(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(f"No database connection free after {self.timeout}s")
+        try:
+            conn = self._pool.getconn()
+            if not self._validate(conn):
+                self._pool.putconn(conn, close=True)
+                conn = self._pool.getconn()
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def checkin(self, conn, broken=False):
+        try:
+            if not broken and not conn.closed:
+                # Never hand out a connection in the middle of a transaction
+                if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                self._last_used[id(conn)] = time.monotonic()
+            else:
+                self._last_used.pop(id(conn), None)
+            self._pool.putconn(conn, close=broken or bool(conn.closed))
+        finally:
+            self._slots.release()
+
+    def close(self):
+        self._pool.closeall()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Return the process-wide pool, opening it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(**DB_CONFIG)
+    return _pool
+
+@contextmanager
+def db_connection():
+    """Check a connection out of the pool for the duration of a with block
+
+    On an exception the transaction is rolled back before the connection
+    goes back to the pool; connections that broke are discarded.
+    """
+    conn = get_pool().checkout()
+    broken = False
+    try:
+        yield conn
+    except Exception as e:
+        broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
+        if not broken:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        raise
+    finally:
+        get_pool().checkin(conn, broken or bool(conn.closed))
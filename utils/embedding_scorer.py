@@ -0,0 +1,180 @@
+import json
+import os
+from pathlib import Path
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from utils.answer_scorer import AnswerIndex, answers_digest
+from utils.file_utils import write_atomic
+
+EMBEDDING_MODEL_DIR = os.getenv('EMBEDDING_MODEL_DIR')
+EMBEDDINGS_PATH = Path(os.getenv(
+    'EMBEDDINGS_PATH',
+    Path(__file__).parent.parent / 'data' / 'answer_embeddings.npy'
+))
+# Storage type of the precomputed matrix: float16, or int8 (components scaled by 127)
+EMBEDDING_DTYPE = os.getenv('EMBEDDING_DTYPE', 'float16')
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '64'))
+INT8_SCALE = 127.0
+
+class SentenceTransformerEncoder:
+    """Sentence embedding model loaded from a local directory, run on CPU"""
+
+    def __init__(self, model_dir):
+        # Optional dependency; only needed when this backend is configured
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(str(model_dir), device='cpu')
+        self.name = f"sentence-transformers:{Path(model_dir).name}"
+
+    def encode(self, texts):
+        """Unit-length float32 embeddings, one row per text"""
+        return self.model.encode(
+            list(texts),
+            batch_size=EMBEDDING_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ).astype(np.float32)
+
+class HashingEncoder:
+    """Model-free stand-in: hashed word and character n-grams in a small dense space"""
+
+    def __init__(self, n_features=1024):
+        self.vectorizers = (
+            HashingVectorizer(analyzer='word', ngram_range=(1, 2), n_features=n_features, norm='l2'),
+            HashingVectorizer(analyzer='char_wb', ngram_range=(3, 5), n_features=n_features, norm='l2')
+        )
+        self.name = f"hashing:{n_features}"
+
+    def encode(self, texts):
+        texts = list(texts)
+        vectors = sum(v.transform(texts) for v in self.vectorizers).toarray().astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+def default_encoder():
+    """The configured embedding model, or the hashing encoder without one"""
+    if EMBEDDING_MODEL_DIR:
+        try:
+            return SentenceTransformerEncoder(EMBEDDING_MODEL_DIR)
+        except Exception as e:
+            print(f"Error loading embedding model, using hashing encoder: {str(e)}")
+    return HashingEncoder()
+
+def _metadata_path(path):
+    return Path(path).with_suffix('.json')
+
+def encode_answers(answers, encoder, dtype=EMBEDDING_DTYPE):
+    """Embed texts in batches and store them as float16, or int8 scaled by 127"""
+    answers = list(answers)
+    if dtype not in ('float16', 'int8'):
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    rows = []
+    for start in range(0, len(answers), EMBEDDING_BATCH_SIZE):
+        rows.append(encoder.encode(answers[start:start + EMBEDDING_BATCH_SIZE]))
+    matrix = np.vstack(rows)
+    if dtype == 'int8':
+        return np.rint(matrix * INT8_SCALE).astype(np.int8)
+    return matrix.astype(np.float16)
+
+def save_embedding_matrix(matrix, answers, encoder, path=EMBEDDINGS_PATH):
+    """Save a matrix as .npy with its metadata sidecar
+
+    The matrix goes first: a sidecar always describes the matrix next to
+    it, or an older one whose digest no longer matches.
+    """
+    path = Path(path)
+    write_atomic(path, lambda f: np.save(f, matrix))
+    metadata = json.dumps({
+        'digest': answers_digest(answers),
+        'encoder': encoder.name,
+        'dtype': matrix.dtype.name,
+        'rows': matrix.shape[0],
+        'dim': matrix.shape[1]
+    })
+    write_atomic(_metadata_path(path), lambda f: f.write(metadata.encode('utf-8')))
+
+def build_embedding_matrix(answers, encoder, path=EMBEDDINGS_PATH, dtype=EMBEDDING_DTYPE):
+    """Embed every ideal answer and save the matrix as .npy with a metadata sidecar"""
+    answers = list(answers)
+    matrix = encode_answers(answers, encoder, dtype)
+    save_embedding_matrix(matrix, answers, encoder, path)
+    return matrix
+
+class EmbeddingScorer(AnswerIndex):
+    """Cosine similarity between sentence embeddings.
+
+    The ideal-answer embeddings are precomputed and memory-mapped, so an
+    evaluation is one encoder pass over the user answer plus a dot product.
+    """
+
+    def __init__(self, encoder, matrix, scale=1.0):
+        self.encoder = encoder
+        self.matrix = matrix
+        self.scale = scale
+        self.metadata = {}
+        self.path = None
+        self._rows_by_answer = {}
+
+    @classmethod
+    def open(cls, encoder, path=EMBEDDINGS_PATH):
+        """Memory-map a matrix written by build_embedding_matrix"""
+        metadata = json.loads(_metadata_path(path).read_text())
+        matrix = np.load(path, mmap_mode='r')
+        if matrix.shape[0] != metadata['rows']:
+            raise ValueError(f"{path} does not match its metadata")
+        scale = 1.0 / INT8_SCALE if metadata['dtype'] == 'int8' else 1.0
+        scorer = cls(encoder, matrix, scale)
+        scorer.metadata = metadata
+        scorer.path = Path(path)
+        return scorer
+
+    def updated(self, bank):
+        """Scorer for a reloaded bank that re-encodes only bank.changed_rows
+
+        Rows that did not change are copied from this scorer's matrix.
+        """
+        n_rows = len(bank)
+        matrix = np.zeros((n_rows, self.matrix.shape[1]), dtype=self.matrix.dtype)
+        kept = min(n_rows, self.matrix.shape[0])
+        matrix[:kept] = self.matrix[:kept]
+        changed = np.asarray(bank.changed_rows, dtype=np.intp)
+        if len(changed):
+            matrix[changed] = encode_answers(
+                (bank.answers[r] for r in changed), self.encoder, matrix.dtype.name)
+        print(f"Embedding {len(changed)} new or changed ideal answers with {self.encoder.name}")
+        save_embedding_matrix(matrix, bank.answers, self.encoder, self.path)
+        scorer = EmbeddingScorer.open(self.encoder, self.path)
+        scorer.index_answers(bank.answers)
+        return scorer
+
+    def similarity(self, user_answer, ideal_answer):
+        vector = self.encoder.encode([user_answer])[0]
+        row_id = self.row_for_answer(ideal_answer)
+        if row_id is not None:
+            ideal = self.matrix[row_id].astype(np.float32) * self.scale
+        else:
+            ideal = self.encoder.encode([ideal_answer])[0]
+        return float(ideal @ vector)
+
+    def score_rows(self, user_answers, row_ids):
+        """Similarity of each answer to the ideal answer of its row id"""
+        vectors = self.encoder.encode(user_answers)
+        ideals = self.matrix[np.asarray(row_ids, dtype=np.intp)].astype(np.float32) * self.scale
+        return np.einsum('ij,ij->i', vectors, ideals)
+
+def load_embedding_scorer(bank, encoder=None, path=EMBEDDINGS_PATH):
+    """Open the precomputed embeddings for this bank, rebuilding them if stale"""
+    encoder = encoder if encoder is not None else default_encoder()
+    digest = answers_digest(bank.answers)
+    scorer = None
+    if Path(path).exists() and _metadata_path(path).exists():
+        try:
+            scorer = EmbeddingScorer.open(encoder, path)
+        except Exception as e:
+            print(f"Ignoring saved answer embeddings: {str(e)}")
+    expected = {'digest': digest, 'encoder': encoder.name, 'dtype': EMBEDDING_DTYPE}
+    if scorer is None or any(scorer.metadata.get(k) != v for k, v in expected.items()):
+        print(f"Embedding {len(bank)} ideal answers with {encoder.name}")
+        build_embedding_matrix(bank.answers, encoder, path)
+        scorer = EmbeddingScorer.open(encoder, path)
+    scorer.index_answers(bank.answers)
+    return scorer
@@ -0,0 +1,35 @@
+class Evaluation:
+    """Result of scoring one answer, produced once and read field by field"""
+
+    __slots__ = ('question', 'score', 'similarity', 'matched_terms', 'missing_terms',
+                 'ideal_answer', 'scoring_ms')
+
+    def __init__(self, question, score, similarity, matched_terms, missing_terms,
+                 ideal_answer, scoring_ms=None):
+        self.question = question
+        self.score = score
+        self.similarity = similarity
+        self.matched_terms = tuple(matched_terms)
+        self.missing_terms = tuple(missing_terms)
+        self.ideal_answer = ideal_answer
+        self.scoring_ms = scoring_ms
+
+    def feedback_text(self):
+        """Plain-text feedback, as stored in question_responses.feedback"""
+        feedback = "Key Points Covered:\n"
+        feedback += "\n".join(f"✓ '{term}'" for term in self.matched_terms)
+        feedback += "\n\nMissing Key Points:\n"
+        feedback += "\n".join(f"• '{term}'" for term in self.missing_terms)
+        return f"Score: {self.score}/10\n\n{feedback}\n\nIdeal Response:\n{self.ideal_answer}"
+
+def average_score(evaluations):
+    """Mean score of a list of evaluations, 0 when there are none"""
+    if not evaluations:
+        return 0.0
+    return sum(e.score for e in evaluations) / len(evaluations)
+
+def final_score(summary, evaluations):
+    """Overall interview score: the saved summary's, or the session average if nothing was saved"""
+    if summary and summary['total_questions']:
+        return summary['score']
+    return average_score(evaluations)
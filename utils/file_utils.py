@@ -0,0 +1,21 @@
+import os
+import tempfile
+from pathlib import Path
+
+def write_atomic(path, write):
+    """Write a file through a uniquely named temp file, then rename it into place
+
+    write(f) receives the temp file opened in binary mode. Readers see the
+    old file or the new one, never a partial one, even with several
+    processes writing at once.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
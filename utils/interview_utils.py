@@ -1,127 +1,389 @@
+import contextvars
+import json
 import os
-import pandas as pd
-from pathlib import Path
-import streamlit as st
 import random
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 import numpy as np
-from openai import OpenAI
+from utils.question_bank import get_question_bank
+from utils.answer_scorer import get_answer_scorer
+from utils.evaluation import Evaluation
+from utils.rephrasings import question_id, rephrasing_store
+from utils.llm_cache import cache_key, llm_cache
+from utils.llm_gateway import llm_gateway, CircuitOpenError
+from utils.llm_metrics import llm_metrics, TokenBudgetExceeded
+from utils.semantic_cache import semantic_cache
 
-client = OpenAI(api_key=os.getenv('KEY'))
+client = llm_gateway.client
+CHAT_MODEL = "gpt-3.5-turbo"
 
-def rephrase_question(question):
-    """Rephrase a technical question into a conversational interview style"""
-    try:
-        prompt = f"""Convert this technical question into a natural, conversational interview style while maintaining its professional tone:
+# Per-call deadlines (seconds), including retries
+REPHRASE_TIMEOUT = float(os.getenv('REPHRASE_TIMEOUT', '8'))
+REPHRASE_BATCH_TIMEOUT = float(os.getenv('REPHRASE_BATCH_TIMEOUT', '20'))
+AI_RESPONSE_TIMEOUT = float(os.getenv('AI_RESPONSE_TIMEOUT', '30'))
+AI_UNAVAILABLE_REPLY = "The AI assistant is busy right now. Please try again in a minute."
+AI_BUDGET_REPLY = "You have used today's AI assistant allowance. Please come back tomorrow."
+
+# Shared by all sessions; prepares upcoming questions off the script thread
+prefetch_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('PREFETCH_WORKERS', '8')),
+    thread_name_prefix='question-prefetch'
+)
+
+# Bump a prompt's version whenever its text changes, so stored variants and
+# cached completions made with the old prompt are no longer served
+REPHRASE_PROMPT_VERSION = 1
+REPHRASE_PROMPT = """Convert this technical question into a natural, conversational interview style while maintaining its professional tone:
 Original: {question}
 Make it sound like a senior data scientist asking a candidate during an interview."""
 
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
+REPHRASE_BATCH_PROMPT_VERSION = 1
+REPHRASE_BATCH_PROMPT = """Convert each of these technical questions into a natural, conversational interview style while maintaining its professional tone. Make each one sound like a senior data scientist asking a candidate during an interview.
+Reply with only a JSON array holding one object per question, in the same order, of the form {{"id": <id>, "rephrased": "<rephrased question>"}}.
+Questions (JSON):
+{questions}"""
+# Questions per batched completion, and the longest rephrasing we accept
+REPHRASE_BATCH_SIZE = int(os.getenv('REPHRASE_BATCH_SIZE', '10'))
+MAX_REPHRASE_CHARS = 800
+
+AI_RESPONSE_PROMPT_VERSION = 1
+AI_RESPONSE_PROMPT = """As an expert data scientist, provide a detailed answer to this interview question: {question}"""
+
+def cached_completion(call_site, key, compute):
+    """llm_cache.get_or_compute that records cache hits in llm_metrics"""
+    started = time.monotonic()
+    return llm_cache.get_or_compute(key, compute, on_hit=lambda: llm_metrics.record(
+        call_site, CHAT_MODEL, time.monotonic() - started, cache='hit'))
+
+def generate_rephrasings(question, n=1):
+    """Ask the model for n conversational rephrasings of a question"""
+    def complete():
+        response = llm_gateway.chat(
+            timeout=REPHRASE_TIMEOUT,
+            call_site='rephrase',
+            model=CHAT_MODEL,
+            messages=[{"role": "user", "content": REPHRASE_PROMPT.format(question=question)}],
+            temperature=0.7,
+            max_tokens=150,
+            n=n
+        )
+        return [choice.message.content.strip() for choice in response.choices]
+
+    key = cache_key(CHAT_MODEL, REPHRASE_PROMPT_VERSION, 0.7, question, max_tokens=150, n=n)
+    return cached_completion('rephrase', key, complete)
+
+def parse_batch_rephrasings(reply, count):
+    """Extract the rephrasing for each question from a batched reply
+
+    Returns a list with one entry per question; entries that are missing or
+    fail validation are None.
+    """
+    results = [None] * count
+    start, end = reply.find('['), reply.rfind(']')
+    if start == -1 or end < start:
+        return results
+    try:
+        items = json.loads(reply[start:end + 1])
+    except ValueError:
+        return results
+    if not isinstance(items, list):
+        return results
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        i, text = item.get('id'), item.get('rephrased')
+        if not isinstance(i, int) or not 0 <= i < count or results[i] is not None:
+            continue
+        if isinstance(text, str) and 0 < len(text.strip()) <= MAX_REPHRASE_CHARS:
+            results[i] = text.strip()
+    return results
+
+def generate_batch_rephrasings(questions, n=1):
+    """Rephrase several questions in one completion
+
+    Returns, for each question, the list of variants (up to n) that parsed.
+    """
+    payload = json.dumps([{"id": i, "question": q} for i, q in enumerate(questions)], ensure_ascii=False)
+    max_tokens = min(4000, 150 * len(questions))
+
+    def complete():
+        response = llm_gateway.chat(
+            timeout=REPHRASE_BATCH_TIMEOUT,
+            call_site='rephrase_batch',
+            model=CHAT_MODEL,
+            messages=[{"role": "user", "content": REPHRASE_BATCH_PROMPT.format(questions=payload)}],
             temperature=0.7,
-            max_tokens=150
+            max_tokens=max_tokens,
+            n=n
         )
-        return response.choices[0].message.content.strip()
+        return [choice.message.content for choice in response.choices]
+
+    key = cache_key(CHAT_MODEL, REPHRASE_BATCH_PROMPT_VERSION, 0.7, payload, max_tokens=max_tokens, n=n)
+    variants = [[] for _ in questions]
+    for reply in cached_completion('rephrase_batch', key, complete):
+        for i, text in enumerate(parse_batch_rephrasings(reply, len(questions))):
+            if text is not None:
+                variants[i].append(text)
+    return variants
+
+def rephrase_question(question):
+    """Rephrase a technical question into a conversational interview style
+
+    Serves a pre-generated variant when one is stored (see prerephrase.py)
+    and only calls the model on a miss. Given a list of questions, returns a
+    list and rephrases the misses together (see rephrase_questions).
+    """
+    if isinstance(question, (list, tuple)):
+        return rephrase_questions(question)
+    try:
+        qid = question_id(question)
+        variants = rephrasing_store.get(qid, REPHRASE_PROMPT_VERSION)
+        if variants:
+            return random.choice(variants)
+
+        rephrased = generate_rephrasings(question)[0]
+        rephrasing_store.add(qid, REPHRASE_PROMPT_VERSION, [rephrased])
+        return rephrased
     except Exception as e:
         print(f"Error rephrasing question: {str(e)}")
         return question
 
-def get_random_question(category="All"):
-    """Get a random question from the dataset and rephrase it"""
-    try:
-        current_dir = Path(__file__).parent.parent
-        data_path = current_dir / 'interview_qa_combined.csv'
+def rephrase_questions(questions, fallback=True):
+    """Rephrase a list of questions with as few completions as possible
 
-        if not data_path.exists():
-            return None, None
+    Stored variants are served directly; the rest are sent in batches of
+    REPHRASE_BATCH_SIZE, and any item a batch fails to produce is rephrased
+    on its own. With fallback=False those items are left as None instead.
+    """
+    results = [None] * len(questions)
+    misses = []
+    for i, question in enumerate(questions):
+        variants = rephrasing_store.get(question_id(question), REPHRASE_PROMPT_VERSION)
+        if variants:
+            results[i] = random.choice(variants)
+        else:
+            misses.append(i)
 
-        df = pd.read_csv(data_path)
-        if df.empty:
-            return None, None
+    for start in range(0, len(misses), REPHRASE_BATCH_SIZE):
+        chunk = misses[start:start + REPHRASE_BATCH_SIZE]
+        batch = [[] for _ in chunk]
+        if len(chunk) > 1:
+            try:
+                batch = generate_batch_rephrasings([questions[i] for i in chunk])
+            except Exception as e:
+                print(f"Error rephrasing question batch: {str(e)}")
+        for i, variants in zip(chunk, batch):
+            if variants:
+                results[i] = variants[0]
+                rephrasing_store.add(question_id(questions[i]), REPHRASE_PROMPT_VERSION, variants[:1])
+            elif fallback:
+                results[i] = rephrase_question(questions[i])
+    return results
 
-        if category != "All":
-            df = df[df['Category'] == category]
+def get_random_question(category="All", sampler=None):
+    """Get a random question from the dataset and rephrase it
 
-        if df.empty:
+    With a QuestionSampler the question is one the user has not seen yet.
+    """
+    try:
+        bank = get_question_bank()
+        if bank is None:
             return None, None
 
-        question = df.sample(n=1).iloc[0]
-        rephrased_question = rephrase_question(question['Question'])
-        return rephrased_question, question['Answer']
+        if sampler is not None:
+            row_id = sampler.draw(bank, category)
+        else:
+            row_id = bank.random_row(category)
+        if row_id is None:
+            return None, None
+
+        question, answer = bank.get(row_id)
+        rephrased_question = rephrase_question(question)
+        return rephrased_question, answer
     except Exception as e:
         print(f"Error getting random question: {str(e)}")
         return None, None
 
+def _prefetch_into(futures, category, sampler):
+    """Draw one question per future and resolve each as soon as it is rephrased"""
+    try:
+        bank = get_question_bank()
+        pairs = []
+        if bank is not None:
+            for _ in futures:
+                row_id = sampler.draw(bank, category) if sampler is not None else bank.random_row(category)
+                if row_id is None:
+                    break
+                pairs.append(bank.get(row_id))
+    except Exception as e:
+        print(f"Error getting random questions: {str(e)}")
+        pairs = []
+    for future in futures[len(pairs):]:
+        future.set_result((None, None))
+    if not pairs:
+        return
+
+    # The next question is rephrased first, on its own, so it never waits for
+    # the batch. The batch is then queued as a task of its own, so no worker
+    # is held while other sessions' next questions wait in the queue.
+    _rephrase_into(futures[0], *pairs[0])
+    if len(pairs) > 1:
+        prefetch_executor.submit(contextvars.copy_context().run, _rephrase_batch_into, futures[1:], pairs[1:])
+
+def _rephrase_into(future, question, answer):
+    future.set_result((rephrase_question(question), answer))
+
+def _rephrase_batch_into(futures, pairs):
+    """Resolve each future with its rephrased pair, rephrasing them together"""
+    try:
+        rephrased = rephrase_questions([question for question, _ in pairs], fallback=False)
+    except Exception as e:
+        print(f"Error rephrasing question batch: {str(e)}")
+        rephrased = [None] * len(pairs)
+    for future, (question, answer), text in zip(futures, pairs, rephrased):
+        if text is not None:
+            future.set_result((text, answer))
+        else:
+            # Items the batch missed are retried concurrently, not one after another
+            prefetch_executor.submit(contextvars.copy_context().run, _rephrase_into, future, question, answer)
+
+def prefetch_questions(category="All", count=1, sampler=None):
+    """Start selecting and rephrasing several questions in the background
+
+    Returns one Future per question, each resolving to a (question, answer)
+    pair as soon as that question is ready, or (None, None) if the category
+    ran out. The first is rephrased on its own; the rest are rephrased
+    together in batches.
+    """
+    futures = [Future() for _ in range(count)]
+    # Run in a copy of the caller's context so the calls are attributed to its
+    # user. The task gets its own copy of the list, which the caller pops from.
+    prefetch_executor.submit(contextvars.copy_context().run, _prefetch_into, list(futures), category, sampler)
+    return futures
+
 def evaluate_answer(question, user_answer, ideal_answer):
-    """Evaluate user's answer using TF-IDF and cosine similarity"""
+    """Evaluate user's answer using TF-IDF and cosine similarity
+
+    Returns an Evaluation, or None if the answer could not be scored.
+    """
     try:
-        # Calculate similarity between user answer and ideal answer
-        vectorizer = TfidfVectorizer()
-        tfidf_matrix = vectorizer.fit_transform([user_answer, ideal_answer])
-        similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
+        started = time.perf_counter()
+        # Calculate similarity between user answer and ideal answer with the
+        # configured scorer backend (TF-IDF fitted over the whole bank by default)
+        similarity = max(0.0, get_answer_scorer().similarity(user_answer, ideal_answer))
 
         # Convert similarity to score (0-10) and round to integer
         score = int(round(similarity * 10))
         
-        # Extract key points from answers using simple text analysis
-        user_keywords = set(word.lower() for word in user_answer.split())
-        ideal_keywords = set(word.lower() for word in ideal_answer.split())
-        
-        # Find matching and missing keywords
-        matches = user_keywords.intersection(ideal_keywords)
-        missing = ideal_keywords - user_keywords
-        
-        # Generate feedback
-        feedback = "Key Points Covered:\n"
-        feedback += "\n".join(f"✓ '{word}'" for word in list(matches)[:3])
-        feedback += "\n\nMissing Key Points:\n"
-        feedback += "\n".join(f"• '{word}'" for word in list(missing)[:3])
+        # Key points covered and missed, most important first
+        matches, missing = get_answer_scorer('tfidf').key_term_diff(user_answer, ideal_answer)
 
-        return f"Score: {score}/10\n\n{feedback}\n\nIdeal Response:\n{ideal_answer}"
+        return Evaluation(
+            question,
+            score,
+            similarity,
+            matches,
+            missing,
+            ideal_answer,
+            (time.perf_counter() - started) * 1000
+        )
     except Exception as e:
         print(f"Error in answer evaluation: {str(e)}")
-        return "Error evaluating answer. Please try again."
+        return None
+
+def evaluate_answers(user_answers, row_ids, top=3):
+    """Score many answers against the ideal answers of their question row ids
+
+    Returns (scores, covered, missing): an int array of 0-10 scores and, per
+    answer, the most important ideal-answer terms it covers and misses.
+    """
+    if len(user_answers) == 0:
+        return np.zeros(0, dtype=int), [], []
+    similarities = get_answer_scorer().score_rows(user_answers, row_ids)
+    covered, missing = get_answer_scorer('tfidf').keyword_diffs(user_answers, row_ids, top)
+    return np.rint(np.clip(similarities, 0, 1) * 10).astype(int), covered, missing
+
+def _ai_response_request(question):
+    """Cache key and completion parameters for an assistant answer"""
+    key = cache_key(CHAT_MODEL, AI_RESPONSE_PROMPT_VERSION, 0.7, question, max_tokens=500)
+    params = dict(
+        timeout=AI_RESPONSE_TIMEOUT,
+        model=CHAT_MODEL,
+        messages=[{"role": "user", "content": AI_RESPONSE_PROMPT.format(question=question)}],
+        temperature=0.7,
+        max_tokens=500
+    )
+    return key, params
+
+def _cached_ai_response(question, key, call_site):
+    """Answer from the exact-match cache, else from a similar earlier question"""
+    started = time.monotonic()
+    answer = llm_cache.get(key)
+    cache = 'hit'
+    if answer is None:
+        answer = semantic_cache.lookup(question)
+        cache = 'semantic'
+    if answer is not None:
+        llm_metrics.record(call_site, CHAT_MODEL, time.monotonic() - started, cache=cache)
+    return answer
+
+def _store_ai_response(question, key, answer):
+    llm_cache.set(key, answer)
+    semantic_cache.add(question, answer)
 
 def get_ai_response(question):
     """Get AI response for user's question using Replit AI"""
     try:
-        prompt = f"""As an expert data scientist, provide a detailed answer to this interview question: {question}"""
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=500
-        )
-        return response.choices[0].message.content.strip()
+        key, params = _ai_response_request(question)
+        answer = _cached_ai_response(question, key, 'ai_response')
+        if answer is None:
+            response = llm_gateway.chat(call_site='ai_response', **params)
+            answer = response.choices[0].message.content.strip()
+            _store_ai_response(question, key, answer)
+        return answer
+    except CircuitOpenError:
+        return AI_UNAVAILABLE_REPLY
+    except TokenBudgetExceeded:
+        return AI_BUDGET_REPLY
     except Exception as e:
         print(f"Error getting AI response: {str(e)}")
         return "Error getting response. Please try again."
 
-def get_question_categories():
-    """Get list of available question categories"""
-    df = load_questions()
-    if df is None:
-        return ["All"]
-    return ["All"] + sorted(df['Category'].unique().tolist())
+def stream_ai_response(question):
+    """Yield the AI response to a user's question as it is generated
 
-def load_questions():
-    """Load interview questions from CSV file"""
-    try:
-        current_dir = Path(__file__).parent.parent
-        data_path = current_dir / 'interview_qa_combined.csv'
+    The complete answer is cached once the stream ends; cached answers are
+    yielded in one piece.
+    """
+    key, params = _ai_response_request(question)
+    cached = _cached_ai_response(question, key, 'ai_response_stream')
+    if cached is not None:
+        yield cached
+        return
 
-        if not data_path.exists():
-            st.error(f"Data file not found at {data_path}")
-            return None
+    parts = []
+    try:
+        for text in llm_gateway.stream_chat(call_site='ai_response_stream', **params):
+            parts.append(text)
+            yield text
+    except CircuitOpenError:
+        yield AI_UNAVAILABLE_REPLY
+        return
+    except TokenBudgetExceeded:
+        yield AI_BUDGET_REPLY
+        return
+    except Exception as e:
+        print(f"Error streaming AI response: {str(e)}")
+        yield "Error getting response. Please try again."
+        return
 
-        df = pd.read_csv(data_path)
-        if df.empty:
-            st.error("The dataset is empty")
-            return None
+    answer = "".join(parts).strip()
+    if answer:
+        _store_ai_response(question, key, answer)
 
-        return df
-    except Exception as e:
-        st.error(f"Error loading questions: {str(e)}")
-        return None
\ No newline at end of file
+def get_question_categories():
+    """Get list of available question categories"""
+    bank = get_question_bank()
+    if bank is None:
+        return ["All"]
+    return list(bank.categories)
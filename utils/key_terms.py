@@ -0,0 +1,145 @@
+import re
+from collections import Counter, defaultdict
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer, ENGLISH_STOP_WORDS
+
+# Key terms kept per ideal answer, most important first
+KEY_TERMS_PER_ANSWER = 32
+
+_TOKEN = re.compile(r"[a-z][a-z0-9]+")
+_SUFFIXES = (
+    ('ational', 'ate'), ('ization', 'ize'), ('fulness', 'ful'), ('iveness', 'ive'),
+    ('ousness', 'ous'), ('sses', 'ss'), ('ies', 'y'), ('ings', ''), ('ing', ''),
+    ('edly', ''), ('ed', ''), ('ly', '')
+)
+
+def stem(word):
+    """Light suffix-stripping stemmer; maps inflections of a word to one key"""
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)] + replacement
+            break
+    else:
+        if word.endswith('s') and not word.endswith(('ss', 'us', 'is')) and len(word) > 3:
+            word = word[:-1]
+    if word.endswith('e') and len(word) > 4:
+        word = word[:-1]
+    return word
+
+def tokenize(text):
+    """Lowercased content words of a text, stopwords removed"""
+    return [w for w in _TOKEN.findall(text.lower()) if w not in ENGLISH_STOP_WORDS]
+
+def analyze(text):
+    """Stemmed content words; the analyzer of the key-term TF-IDF model"""
+    return [stem(w) for w in tokenize(text)]
+
+class KeyTermIndex:
+    """Ranked key terms of every ideal answer, as compact term-id arrays.
+
+    For row id i, ranked[offsets[i]:offsets[i + 1]] holds the answer's
+    stemmed terms ordered by TF-IDF weight over the whole bank. The same
+    slice of sorted_ids holds those ids in ascending order, and ranks maps
+    each sorted id back to its position in the ranking.
+    """
+
+    def __init__(self, vectorizer, display, offsets, ranked, sorted_ids, ranks):
+        self.vectorizer = vectorizer
+        self.display = display
+        self.offsets = offsets
+        self.ranked = ranked
+        self.sorted_ids = sorted_ids
+        self.ranks = ranks
+        self.vocabulary = vectorizer.vocabulary_
+
+    @classmethod
+    def build(cls, answers, per_answer=KEY_TERMS_PER_ANSWER):
+        answers = list(answers)
+        vectorizer = TfidfVectorizer(analyzer=analyze, dtype=np.float32)
+        weights = vectorizer.fit_transform(answers).tocsr()
+
+        # Show each stem as the surface word it most often comes from
+        surface = defaultdict(Counter)
+        for answer in answers:
+            for word in tokenize(answer):
+                surface[stem(word)][word] += 1
+        display = [None] * len(vectorizer.vocabulary_)
+        for term, term_id in vectorizer.vocabulary_.items():
+            display[term_id] = surface[term].most_common(1)[0][0]
+
+        id_type = np.uint16 if len(display) <= np.iinfo(np.uint16).max else np.uint32
+        offsets = np.zeros(len(answers) + 1, dtype=np.uint32)
+        ranked, sorted_ids, ranks = [], [], []
+        for row_id in range(len(answers)):
+            start, end = weights.indptr[row_id], weights.indptr[row_id + 1]
+            order = np.argsort(-weights.data[start:end], kind='stable')[:per_answer]
+            terms = weights.indices[start:end][order]
+            by_id = np.argsort(terms, kind='stable')
+            ranked.append(terms)
+            sorted_ids.append(terms[by_id])
+            ranks.append(by_id)
+            offsets[row_id + 1] = offsets[row_id] + len(terms)
+
+        def flat(parts, dtype):
+            return np.concatenate(parts).astype(dtype) if parts else np.zeros(0, dtype=dtype)
+
+        return cls(vectorizer, tuple(display), offsets, flat(ranked, id_type),
+                   flat(sorted_ids, id_type), flat(ranks, np.uint8))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def term_ids(self, text):
+        """Sorted, unique ids of the known terms in a text"""
+        ids = [self.vocabulary[t] for t in analyze(text) if t in self.vocabulary]
+        return np.unique(np.asarray(ids, dtype=self.ranked.dtype))
+
+    def _row(self, row_id):
+        start, end = self.offsets[row_id], self.offsets[row_id + 1]
+        return self.ranked[start:end], self.sorted_ids[start:end], self.ranks[start:end]
+
+    def _rank_text(self, text):
+        weights = self.vectorizer.transform([text])
+        order = np.argsort(-weights.data, kind='stable')[:KEY_TERMS_PER_ANSWER]
+        ranked = weights.indices[order].astype(self.ranked.dtype)
+        by_id = np.argsort(ranked, kind='stable')
+        return ranked, ranked[by_id], by_id
+
+    def diff(self, user_answer, row_id=None, ideal_answer=None, top=3):
+        """Most important key terms of an ideal answer the user covered and missed
+
+        Uses the precomputed terms of row_id, or ranks ideal_answer's terms
+        on the fly when it is not in the bank.
+        """
+        if row_id is not None:
+            ranked, sorted_ids, ranks = self._row(row_id)
+        else:
+            ranked, sorted_ids, ranks = self._rank_text(ideal_answer)
+        _, positions, _ = np.intersect1d(sorted_ids, self.term_ids(user_answer),
+                                         assume_unique=True, return_indices=True)
+        hit = np.zeros(len(ranked), dtype=bool)
+        hit[ranks[positions]] = True
+        return self.names(ranked[hit][:top]), self.names(ranked[~hit][:top])
+
+    def diff_rows(self, user_answers, row_ids, top=3):
+        """diff for many answers, with the membership tests done in one sparse lookup"""
+        presence = self.vectorizer.transform(user_answers).tocsr()
+        row_ids = np.asarray(row_ids, dtype=np.intp)
+        starts, ends = self.offsets[row_ids], self.offsets[row_ids + 1]
+        lengths = (ends - starts).astype(np.intp)
+        bounds = np.concatenate([[0], np.cumsum(lengths)]).astype(np.intp)
+        pair = np.repeat(np.arange(len(row_ids)), lengths)
+        positions = np.arange(bounds[-1]) + np.repeat(starts.astype(np.intp) - bounds[:-1], lengths)
+        terms = self.ranked[positions].astype(np.intp)
+        hit = np.asarray(presence[pair, terms]).ravel() > 0
+
+        covered, missing = [], []
+        for i in range(len(row_ids)):
+            row_terms = terms[bounds[i]:bounds[i + 1]]
+            row_hit = hit[bounds[i]:bounds[i + 1]]
+            covered.append(self.names(row_terms[row_hit][:top]))
+            missing.append(self.names(row_terms[~row_hit][:top]))
+        return covered, missing
+
+    def names(self, term_ids):
+        return [self.display[i] for i in term_ids]
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+
+LLM_CACHE_PATH = Path(os.getenv(
+    'LLM_CACHE_PATH',
+    Path(__file__).parent.parent / 'data' / 'llm_cache.db'
+))
+LLM_CACHE_SIZE = int(os.getenv('LLM_CACHE_SIZE', '1024'))
+LLM_CACHE_TTL = float(os.getenv('LLM_CACHE_TTL', str(24 * 3600)))
+LLM_CACHE_DISK_TTL = float(os.getenv('LLM_CACHE_DISK_TTL', str(30 * 24 * 3600)))
+
+def cache_key(model, prompt_version, temperature, text, **params):
+    """Hash of everything that determines a completion"""
+    payload = json.dumps(
+        [model, prompt_version, temperature, text, sorted(params.items())],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class MemoryCache:
+    """Bounded LRU with a per-entry time to live"""
+
+    def __init__(self, maxsize=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+class DiskCache:
+    """Persistent SQLite tier shared by every process on the host.
+
+    Values are stored as zlib-compressed JSON.
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH, ttl=LLM_CACHE_DISK_TTL):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.evictions = 0
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            ''')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        try:
+            row = self._connect().execute(
+                'SELECT value, created_at FROM llm_cache WHERE key = ?', (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading LLM cache: {str(e)}")
+            return None
+        if row is None or row[1] < time.time() - self.ttl:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+
+    def set(self, key, value):
+        blob = zlib.compress(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO llm_cache (key, value, created_at)
+                    VALUES (?, ?, ?)
+                ''', (key, blob, time.time()))
+                # Expired rows are cleared out every few hundred writes
+                self._writes += 1
+                if self._writes % 500 == 0:
+                    cur = conn.execute(
+                        'DELETE FROM llm_cache WHERE created_at < ?',
+                        (time.time() - self.ttl,)
+                    )
+                    self.evictions += cur.rowcount
+        except sqlite3.Error as e:
+            print(f"Error writing LLM cache: {str(e)}")
+
+class LLMCache:
+    """In-process LRU in front of the on-disk store"""
+
+    def __init__(self, memory=None, disk=None):
+        self.memory = memory if memory is not None else MemoryCache()
+        self.disk = disk if disk is not None else DiskCache()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            self._count('memory_hits')
+            return value
+        value = self.disk.get(key)
+        if value is not None:
+            self._count('disk_hits')
+            self.memory.set(key, value)
+            return value
+        self._count('misses')
+        return None
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        self.disk.set(key, value)
+
+    def get_or_compute(self, key, compute, on_hit=None):
+        """Return the cached value, calling compute() and caching it on a miss
+
+        on_hit(), if given, is called when the value came from the cache.
+        """
+        value = self.get(key)
+        if value is not None:
+            if on_hit is not None:
+                on_hit()
+        else:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def stats(self):
+        """Hit, miss and eviction counters"""
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'memory_evictions': self.memory.evictions,
+            'disk_evictions': self.disk.evictions,
+            'memory_entries': len(self.memory)
+        }
+
+llm_cache = LLMCache()
@@ -0,0 +1,138 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from types import SimpleNamespace
+
+LLM_CASSETTE = os.getenv('LLM_CASSETTE')
+LLM_CASSETTE_MODE = os.getenv('LLM_CASSETTE_MODE', 'replay')
+LLM_CASSETTE_TIMING = os.getenv('LLM_CASSETTE_TIMING', 'recorded')
+
+class CassetteMiss(Exception):
+    """Raised in replay mode for a request that was never recorded"""
+
+def request_key(params):
+    """Hash of the request parameters that determine a completion"""
+    relevant = {k: v for k, v in params.items() if k not in ('timeout', 'stream')}
+    payload = json.dumps(relevant, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _response(entry):
+    """Rebuild the parts of a chat completion object the app reads"""
+    usage = entry.get('usage')
+    return SimpleNamespace(
+        choices=[
+            SimpleNamespace(index=i, message=SimpleNamespace(role='assistant', content=text))
+            for i, text in enumerate(entry['choices'])
+        ],
+        usage=SimpleNamespace(**usage) if usage else None
+    )
+
+class Cassette:
+    """Recorded LLM traffic, for deterministic end-to-end benchmarks.
+
+    In 'record' mode every upstream call is appended to a gzip-compressed
+    JSON-lines file together with its observed latency (and, for streams,
+    the delay before every chunk). In 'replay' mode requests are answered
+    from that file in recording order, either with the recorded timing or,
+    with timing='none', immediately.
+    """
+
+    def __init__(self, path, mode='replay', timing='recorded'):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.timing = timing
+        self._lock = threading.Lock()
+        self._entries = defaultdict(deque)
+        if mode == 'replay':
+            self._load()
+
+    @property
+    def replaying(self):
+        return self.mode == 'replay'
+
+    def _load(self):
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                self._entries[entry['key']].append(entry)
+
+    def _append(self, entry):
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            with gzip.open(self.path, 'at', encoding='utf-8') as f:
+                f.write(line)
+
+    def _next(self, params):
+        key = request_key(params)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMiss(f"No recorded response for request {key[:12]}")
+            entry = entries.popleft()
+            # Keep serving the last recording once a key's takes are used up
+            if not entries:
+                entries.append(entry)
+            return entry
+
+    def _sleep(self, seconds):
+        if self.timing == 'recorded' and seconds > 0:
+            time.sleep(seconds)
+
+    def record(self, params, response, latency):
+        usage = getattr(response, 'usage', None)
+        self._append({
+            'key': request_key(params),
+            'kind': 'chat',
+            'model': params.get('model'),
+            'latency': round(latency, 4),
+            'choices': [choice.message.content for choice in response.choices],
+            'usage': {
+                'prompt_tokens': usage.prompt_tokens,
+                'completion_tokens': usage.completion_tokens,
+                'total_tokens': usage.total_tokens
+            } if usage else None
+        })
+
+    def record_stream(self, params, chunks, usage=None):
+        """Store a finished stream given as (delay since previous chunk, text) pairs"""
+        self._append({
+            'key': request_key(params),
+            'kind': 'stream',
+            'model': params.get('model'),
+            'latency': round(sum(delay for delay, _ in chunks), 4),
+            'chunks': [[round(delay, 4), text] for delay, text in chunks],
+            'usage': usage or None
+        })
+
+    def replay(self, params):
+        entry = self._next(params)
+        if entry['kind'] == 'stream':
+            entry = dict(entry, choices=[''.join(text for _, text in entry['chunks'])])
+        self._sleep(entry['latency'])
+        return _response(entry)
+
+    def replay_stream(self, params, usage=None):
+        """Yield the recorded text chunks; fills `usage` with the recorded token counts"""
+        entry = self._next(params)
+        if usage is not None and entry.get('usage'):
+            usage['prompt_tokens'] = entry['usage'].get('prompt_tokens')
+            usage['completion_tokens'] = entry['usage'].get('completion_tokens')
+        if entry['kind'] == 'stream':
+            for delay, text in entry['chunks']:
+                self._sleep(delay)
+                yield text
+        else:
+            self._sleep(entry['latency'])
+            yield entry['choices'][0]
+
+def cassette_from_env():
+    """Cassette configured by LLM_CASSETTE / LLM_CASSETTE_MODE / LLM_CASSETTE_TIMING, if any"""
+    if not LLM_CASSETTE:
+        return None
+    return Cassette(LLM_CASSETTE, LLM_CASSETTE_MODE, LLM_CASSETTE_TIMING)
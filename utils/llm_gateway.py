@@ -0,0 +1,309 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+import openai
+from openai import OpenAI
+from utils.llm_cassette import cassette_from_env, request_key
+from utils.llm_metrics import TokenBudgetExceeded, llm_metrics
+
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '16'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '3'))
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '30'))
+LLM_BREAKER_FAILURES = int(os.getenv('LLM_BREAKER_FAILURES', '5'))
+LLM_BREAKER_RESET = float(os.getenv('LLM_BREAKER_RESET', '30'))
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the circuit breaker is open"""
+
+class DeadlineExceeded(Exception):
+    """Raised when a call cannot finish before its deadline"""
+
+class CircuitBreaker:
+    """Stops calling a degraded upstream for a cool-down period.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    every call fails fast. Once `reset_timeout` has passed a single trial
+    call is let through; its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold=LLM_BREAKER_FAILURES, reset_timeout=LLM_BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return 'open'
+        return 'half-open'
+
+    def allow(self):
+        """Return how a call may go upstream now: 'closed', 'trial', or None if it may not"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return 'closed'
+            if state == 'half-open' and not self._trial_running:
+                self._trial_running = True
+                return 'trial'
+            return None
+
+    def release_trial(self):
+        """Give back a trial slot whose call never reached upstream"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one.
+
+    The first caller for a key runs the call; callers arriving while it is
+    in flight wait for and share its result (or exception).
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, timeout=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            try:
+                return call.result(timeout=timeout)
+            except FutureTimeoutError:
+                raise DeadlineExceeded("Timed out waiting for an identical in-flight call")
+
+        try:
+            result = fn()
+            call.set_result(result)
+            return result
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+def is_retryable(error):
+    """Rate limits, server errors, timeouts and dropped connections are retried"""
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, openai.APIConnectionError)
+
+def call_outcome(error):
+    """Short label for how a failed call ended, for the call metrics"""
+    if isinstance(error, CircuitOpenError):
+        return 'circuit_open'
+    if isinstance(error, TokenBudgetExceeded):
+        return 'budget_exceeded'
+    if isinstance(error, (DeadlineExceeded, openai.APITimeoutError)):
+        return 'timeout'
+    if isinstance(error, openai.APIStatusError):
+        if error.status_code == 429:
+            return 'rate_limited'
+        return 'server_error' if error.status_code >= 500 else 'rejected'
+    if isinstance(error, openai.APIConnectionError):
+        return 'connection_error'
+    return 'error'
+
+def _usage_tokens(usage):
+    if usage is None:
+        return None, None
+    return usage.prompt_tokens, usage.completion_tokens
+
+class LLMGateway:
+    """Single entry point for chat completions.
+
+    Wraps one OpenAI client, and with it one HTTP connection pool, shared by
+    every session in the process. Each call gets a deadline, retries 429/5xx
+    with jittered exponential backoff inside that deadline, waits for a slot
+    in a process-wide concurrency limit and is refused outright while the
+    circuit breaker is open. Every call is recorded in llm_metrics under the
+    caller's `call_site`, and refused once the user's token budget is spent.
+    """
+
+    def __init__(self, api_key=None, base_url=None, max_concurrency=LLM_MAX_CONCURRENCY,
+                 max_retries=LLM_MAX_RETRIES, timeout=LLM_TIMEOUT, breaker=None, cassette=None):
+        # The SDK's own retries are disabled so they cannot outlive our deadline
+        self.client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0, timeout=timeout)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        # Optional record/replay of upstream traffic (see utils/llm_cassette.py)
+        self.cassette = cassette
+        self.single_flight = SingleFlight()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(8.0, 0.5 * 2 ** attempt))
+
+    def _acquire(self, deadline):
+        granted = self.breaker.allow()
+        if granted is None:
+            raise CircuitOpenError("LLM upstream is unavailable")
+        if not self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            # Local congestion says nothing about upstream health
+            if granted == 'trial':
+                self.breaker.release_trial()
+            raise DeadlineExceeded("No free LLM slot before the deadline")
+
+    def _create(self, deadline, params):
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.breaker.record_failure()
+                raise DeadlineExceeded("LLM call deadline exceeded")
+            try:
+                response = self.client.with_options(timeout=remaining).chat.completions.create(**params)
+                self.breaker.record_success()
+                return response
+            except Exception as e:
+                if not is_retryable(e):
+                    # Upstream answered; the request itself was rejected
+                    self.breaker.record_success()
+                    raise
+                delay = self._backoff(attempt)
+                if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                    self.breaker.record_failure()
+                    raise
+                attempt += 1
+                time.sleep(delay)
+
+    def chat(self, timeout=None, call_site='chat', **params):
+        """Create a chat completion, finishing or failing within `timeout` seconds
+
+        Identical requests already in flight in this process are not sent
+        again; the caller waits for and shares that call's response.
+        """
+        timeout = timeout or self.timeout
+        return self.single_flight.do(
+            request_key(params),
+            lambda: self._measured_chat(timeout, call_site, params),
+            timeout
+        )
+
+    def _measured_chat(self, timeout, call_site, params):
+        started = time.monotonic()
+        response = None
+        outcome = 'ok'
+        try:
+            llm_metrics.check_budget()
+            response = self._chat(timeout, params)
+            return response
+        except Exception as e:
+            outcome = call_outcome(e)
+            raise
+        finally:
+            prompt_tokens, completion_tokens = _usage_tokens(getattr(response, 'usage', None))
+            llm_metrics.record(call_site, params.get('model'), time.monotonic() - started,
+                               prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                               outcome=outcome)
+
+    def _chat(self, timeout, params):
+        if self.cassette is not None and self.cassette.replaying:
+            return self.cassette.replay(params)
+        deadline = time.monotonic() + timeout
+        self._acquire(deadline)
+        try:
+            started = time.monotonic()
+            response = self._create(deadline, params)
+            if self.cassette is not None:
+                self.cassette.record(params, response, time.monotonic() - started)
+            return response
+        finally:
+            self._slots.release()
+
+    def stream_chat(self, timeout=None, call_site='chat_stream', **params):
+        """Create a streaming chat completion and yield its text as it arrives
+
+        Retries only happen before the first chunk; the slot is held until the
+        stream is exhausted or closed.
+        """
+        started = time.monotonic()
+        first_chunk_at = None
+        usage = {}
+        outcome = 'ok'
+        try:
+            llm_metrics.check_budget()
+            if self.cassette is not None and self.cassette.replaying:
+                chunks = self.cassette.replay_stream(params, usage)
+            else:
+                chunks = self._stream(timeout, params, usage)
+            for text in chunks:
+                if first_chunk_at is None:
+                    first_chunk_at = time.monotonic()
+                yield text
+        except GeneratorExit:
+            outcome = 'cancelled'
+            raise
+        except Exception as e:
+            outcome = call_outcome(e)
+            raise
+        finally:
+            llm_metrics.record(
+                call_site, params.get('model'), time.monotonic() - started,
+                ttft=first_chunk_at - started if first_chunk_at is not None else None,
+                prompt_tokens=usage.get('prompt_tokens'),
+                completion_tokens=usage.get('completion_tokens'),
+                outcome=outcome
+            )
+
+    def _stream(self, timeout, params, usage):
+        """Yield upstream text chunks; fills `usage` from the final chunk"""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        self._acquire(deadline)
+        try:
+            chunks = []
+            last = time.monotonic()
+            stream = self._create(deadline, dict(params, stream=True, stream_options={'include_usage': True}))
+            try:
+                for chunk in stream:
+                    if getattr(chunk, 'usage', None) is not None:
+                        usage['prompt_tokens'], usage['completion_tokens'] = _usage_tokens(chunk.usage)
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        now = time.monotonic()
+                        chunks.append((now - last, chunk.choices[0].delta.content))
+                        last = now
+                        yield chunk.choices[0].delta.content
+            except Exception as e:
+                if is_retryable(e):
+                    self.breaker.record_failure()
+                raise
+            if self.cassette is not None:
+                self.cassette.record_stream(params, chunks, dict(usage))
+        finally:
+            self._slots.release()
+
+llm_gateway = LLMGateway(
+    api_key=os.getenv('KEY'),
+    base_url=os.getenv('OPENAI_BASE_URL'),
+    cassette=cassette_from_env()
+)
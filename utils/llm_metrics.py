@@ -0,0 +1,223 @@
+import atexit
+import contextvars
+import os
+import threading
+from collections import Counter, defaultdict, deque
+from datetime import datetime
+import numpy as np
+
+LLM_METRICS_WINDOW = int(os.getenv('LLM_METRICS_WINDOW', '1000'))
+LLM_METRICS_PERSIST = os.getenv('LLM_METRICS_PERSIST', '1') == '1'
+LLM_METRICS_FLUSH_SIZE = int(os.getenv('LLM_METRICS_FLUSH_SIZE', '50'))
+LLM_METRICS_FLUSH_INTERVAL = float(os.getenv('LLM_METRICS_FLUSH_INTERVAL', '10'))
+# Tokens a user may spend per calendar day; 0 disables the budget
+LLM_USER_DAILY_TOKENS = int(os.getenv('LLM_USER_DAILY_TOKENS', '0'))
+
+class TokenBudgetExceeded(Exception):
+    """Raised instead of calling upstream for a user who has spent their daily tokens"""
+
+# (user_id, interview_id) that model calls made from this context are billed to
+_attribution = contextvars.ContextVar('llm_attribution', default=(None, None))
+
+def set_attribution(user_id, interview_id=None):
+    """Attribute model calls made from the current context to a user and interview"""
+    _attribution.set((user_id, interview_id))
+
+def current_attribution():
+    return _attribution.get()
+
+class MetricsRegistry:
+    """Rolling per-call-site latency, token, cache and outcome statistics.
+
+    Latencies are kept for the last `window` calls of each call site, so the
+    percentiles follow recent behaviour; counters cover the process lifetime.
+    """
+
+    def __init__(self, window=LLM_METRICS_WINDOW):
+        self.window = window
+        self._sites = defaultdict(self._new_site)
+        self._lock = threading.Lock()
+
+    def _new_site(self):
+        return {
+            'latency': deque(maxlen=self.window),
+            'ttft': deque(maxlen=self.window),
+            'calls': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'cache': Counter(),
+            'outcomes': Counter()
+        }
+
+    def record(self, call):
+        with self._lock:
+            site = self._sites[call['call_site']]
+            site['calls'] += 1
+            site['latency'].append(call['latency_ms'])
+            if call['ttft_ms'] is not None:
+                site['ttft'].append(call['ttft_ms'])
+            site['prompt_tokens'] += call['prompt_tokens'] or 0
+            site['completion_tokens'] += call['completion_tokens'] or 0
+            site['cache'][call['cache']] += 1
+            site['outcomes'][call['outcome']] += 1
+
+    @staticmethod
+    def _percentiles(values):
+        if not values:
+            return None
+        p50, p95, p99 = np.percentile(np.fromiter(values, dtype=float), [50, 95, 99])
+        return {'p50': round(float(p50), 1), 'p95': round(float(p95), 1), 'p99': round(float(p99), 1)}
+
+    def snapshot(self):
+        """Statistics per call site; latencies in milliseconds"""
+        with self._lock:
+            return {
+                name: {
+                    'calls': site['calls'],
+                    'latency_ms': self._percentiles(site['latency']),
+                    'ttft_ms': self._percentiles(site['ttft']),
+                    'prompt_tokens': site['prompt_tokens'],
+                    'completion_tokens': site['completion_tokens'],
+                    'cache': dict(site['cache']),
+                    'outcomes': dict(site['outcomes'])
+                }
+                for name, site in self._sites.items()
+            }
+
+# The database layer is imported on first use, so modules that only call the
+# model (the gateway, prerephrase.py) do not load db_utils and its pool
+def _save_llm_calls(calls):
+    from db_utils import save_llm_calls
+    return save_llm_calls(calls)
+
+def _load_token_usage(user_id, since):
+    from db_utils import get_user_token_usage
+    return get_user_token_usage(user_id, since)
+
+class CallLogWriter:
+    """Saves call records to the database in batches.
+
+    Records are buffered and written by a background thread once
+    `flush_size` have accumulated or every `flush_interval` seconds, and
+    once more when the process exits.
+    """
+
+    def __init__(self, save=_save_llm_calls, flush_size=LLM_METRICS_FLUSH_SIZE,
+                 flush_interval=LLM_METRICS_FLUSH_INTERVAL):
+        self.save = save
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def add(self, call):
+        with self._lock:
+            self._buffer.append(call)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='llm-metrics-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+            if len(self._buffer) >= self.flush_size:
+                self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if batch and not self.save(batch):
+            print(f"Dropped {len(batch)} LLM call records")
+
+class TokenBudget:
+    """Per-user daily token allowance.
+
+    A user's spend for the day is loaded from the database the first time
+    they are seen and then kept up to date in memory.
+    """
+
+    def __init__(self, daily_tokens=LLM_USER_DAILY_TOKENS, load_usage=_load_token_usage):
+        self.daily_tokens = daily_tokens
+        self.load_usage = load_usage
+        self._day = None
+        self._spent = {}
+        self._lock = threading.Lock()
+
+    def _spent_today(self, user_id):
+        today = datetime.now().date()
+        with self._lock:
+            if today != self._day:
+                self._day = today
+                self._spent = {}
+            if user_id in self._spent:
+                return self._spent[user_id]
+        # Query outside the lock so a slow database only delays this user
+        since = datetime.combine(today, datetime.min.time())
+        loaded = (self.load_usage(user_id, since) or 0) if LLM_METRICS_PERSIST else 0
+        with self._lock:
+            if today != self._day:
+                return loaded
+            # Another thread may have loaded and charged this user meanwhile
+            return self._spent.setdefault(user_id, loaded)
+
+    def remaining(self, user_id):
+        """Tokens left today, or None if the user is not limited"""
+        if not self.daily_tokens or user_id is None:
+            return None
+        return max(0, self.daily_tokens - self._spent_today(user_id))
+
+    def check(self, user_id):
+        if self.remaining(user_id) == 0:
+            raise TokenBudgetExceeded(f"User {user_id} has used today's {self.daily_tokens} tokens")
+
+    def charge(self, user_id, tokens):
+        if not self.daily_tokens or user_id is None or not tokens:
+            return
+        self._spent_today(user_id)
+        with self._lock:
+            if user_id in self._spent:
+                self._spent[user_id] += tokens
+
+class LLMMetrics:
+    """Accounting for every model call: registry, database log and budgets"""
+
+    def __init__(self, registry=None, writer=None, budget=None):
+        self.registry = registry if registry is not None else MetricsRegistry()
+        self.writer = writer if writer is not None else (CallLogWriter() if LLM_METRICS_PERSIST else None)
+        self.budget = budget if budget is not None else TokenBudget()
+
+    def record(self, call_site, model, latency, ttft=None, prompt_tokens=None,
+               completion_tokens=None, cache='miss', outcome='ok'):
+        """Record one model call or cache hit; times are in seconds"""
+        user_id, interview_id = current_attribution()
+        call = {
+            'user_id': user_id,
+            'interview_id': interview_id,
+            'call_site': call_site,
+            'model': model,
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'latency_ms': int(latency * 1000),
+            'ttft_ms': int(ttft * 1000) if ttft is not None else None,
+            'cache': cache,
+            'outcome': outcome,
+            'created_at': datetime.now()
+        }
+        self.registry.record(call)
+        self.budget.charge(user_id, (prompt_tokens or 0) + (completion_tokens or 0))
+        if self.writer is not None:
+            self.writer.add(call)
+
+    def check_budget(self):
+        """Raise TokenBudgetExceeded if the current user has no tokens left today"""
+        self.budget.check(current_attribution()[0])
+
+    def stats(self):
+        return self.registry.snapshot()
+
+llm_metrics = LLMMetrics()
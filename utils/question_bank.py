@@ -0,0 +1,234 @@
+import csv
+import os
+import random
+import threading
+import time
+from array import array
+from pathlib import Path
+from utils.corpus import Corpus, CorpusError
+
+DATA_PATH = Path(__file__).parent.parent / 'interview_qa_combined.csv'
+CORPUS_PATH = DATA_PATH.with_suffix('.qbc')
+
+def read_csv_columns(path=DATA_PATH):
+    """Read the dataset CSV into Type, Category, Question and Answer lists"""
+    columns = ([], [], [], [])
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            columns[0].append(row['Type'])
+            columns[1].append(row['Category'])
+            columns[2].append(row['Question'])
+            columns[3].append(row['Answer'])
+    return columns
+
+class QuestionBank:
+    """Read-only, indexed view of the interview question dataset"""
+
+    def __init__(self, type_names, category_names, type_ids, category_ids,
+                 questions, answers, previous=None):
+        # Column arrays, one entry per row id. Text columns may be plain
+        # tuples or lazily decoded views over a memory-mapped corpus.
+        self.type_names = tuple(type_names)
+        self.category_names = tuple(category_names)
+        self.type_ids = type_ids
+        self.category_ids = category_ids
+        self.questions = questions
+        self.answers = answers
+
+        # Row ids per category, plus the "All" pseudo-category. When this
+        # bank replaces an earlier one only the rows that changed are
+        # re-bucketed; see changed_rows.
+        if previous is None:
+            self.changed_rows = array('I', range(len(self.questions)))
+            self._rows = self._build_index()
+        else:
+            self.changed_rows = previous.diff(self)
+            self._rows = self._patch_index(previous)
+
+        self.categories = ["All"] + list(self.category_names)
+
+    def _build_index(self):
+        rows = {name: array('I') for name in self.category_names}
+        for row_id, category_id in enumerate(self.category_ids):
+            rows[self.category_names[category_id]].append(row_id)
+        rows["All"] = array('I', range(len(self.questions)))
+        return rows
+
+    def _patch_index(self, previous):
+        # Rows that changed or disappeared leave their old bucket, changed
+        # rows join their new one; buckets nobody touched are shared as-is.
+        moved = set(self.changed_rows)
+        moved.update(range(len(self), len(previous)))
+        affected = {previous.category(r) for r in moved if r < len(previous)}
+        affected.update(self.category(r) for r in self.changed_rows)
+
+        rows = {}
+        for name in self.category_names:
+            old = previous._rows.get(name, array('I'))
+            if name not in affected:
+                rows[name] = old
+                continue
+            kept = [r for r in old if r not in moved]
+            added = [r for r in self.changed_rows if self.category(r) == name]
+            rows[name] = array('I', sorted(kept + added))
+
+        if len(self) == len(previous):
+            rows["All"] = previous._rows["All"]
+        else:
+            rows["All"] = array('I', range(len(self)))
+        return rows
+
+    @classmethod
+    def from_rows(cls, types, categories, questions, answers, previous=None):
+        """Build a bank from plain per-row columns, interning Type/Category"""
+        type_names = sorted(set(types))
+        category_names = sorted(set(categories))
+        type_ids = {name: i for i, name in enumerate(type_names)}
+        category_ids = {name: i for i, name in enumerate(category_names)}
+        return cls(
+            type_names,
+            category_names,
+            array('H', (type_ids[t] for t in types)),
+            array('H', (category_ids[c] for c in categories)),
+            tuple(questions),
+            tuple(answers),
+            previous
+        )
+
+    @classmethod
+    def from_csv(cls, path=DATA_PATH, previous=None):
+        """Build a bank from the Type/Category/Question/Answer CSV"""
+        types, categories, questions, answers = read_csv_columns(path)
+        return cls.from_rows(types, categories, questions, answers, previous)
+
+    @classmethod
+    def from_corpus(cls, path=CORPUS_PATH, previous=None):
+        """Open a compiled corpus file without copying its text"""
+        corpus = Corpus(path)
+        return cls(
+            corpus.type_names,
+            corpus.category_names,
+            corpus.type_ids,
+            corpus.category_ids,
+            corpus.questions,
+            corpus.answers,
+            previous
+        )
+
+    def __len__(self):
+        return len(self.questions)
+
+    def row_ids(self, category="All"):
+        """Return the row ids belonging to a category"""
+        return self._rows.get(category, array('I'))
+
+    def category(self, row_id):
+        """Return the category name of a row"""
+        return self.category_names[self.category_ids[row_id]]
+
+    def question_type(self, row_id):
+        """Return the Type (Technical/Behavioral) of a row"""
+        return self.type_names[self.type_ids[row_id]]
+
+    def get(self, row_id):
+        """Return the (question, answer) pair for a row"""
+        return self.questions[row_id], self.answers[row_id]
+
+    def row(self, row_id):
+        """Return the full (type, category, question, answer) record of a row"""
+        return (self.question_type(row_id), self.category(row_id),
+                self.questions[row_id], self.answers[row_id])
+
+    def diff(self, other):
+        """Row ids of `other` that are new or differ from this bank"""
+        changed = array('I')
+        for row_id in range(len(other)):
+            if row_id >= len(self) or self.row(row_id) != other.row(row_id):
+                changed.append(row_id)
+        return changed
+
+    def random_row(self, category="All"):
+        """Pick a random row id from a category, or None if it is empty"""
+        rows = self.row_ids(category)
+        if not rows:
+            return None
+        return random.choice(rows)
+
+def load_question_bank(previous=None):
+    """Load the compiled corpus, falling back to the CSV when it is missing or stale"""
+    if CORPUS_PATH.exists():
+        if not DATA_PATH.exists() or CORPUS_PATH.stat().st_mtime >= DATA_PATH.stat().st_mtime:
+            try:
+                return QuestionBank.from_corpus(CORPUS_PATH, previous)
+            except CorpusError as e:
+                print(f"Ignoring corpus file: {str(e)}")
+        else:
+            print(f"{CORPUS_PATH.name} is older than {DATA_PATH.name}, run build_corpus.py")
+    if not DATA_PATH.exists():
+        print(f"Data file not found at {DATA_PATH}")
+        return None
+    return QuestionBank.from_csv(DATA_PATH, previous)
+
+# How often (seconds) get_question_bank looks at the dataset files for changes
+RELOAD_INTERVAL = float(os.getenv('QUESTION_RELOAD_INTERVAL', '5'))
+
+_bank = None
+_bank_stamp = None
+_bank_checked_at = 0.0
+_bank_lock = threading.Lock()
+_reload_callbacks = []
+
+def _source_stamp():
+    """(mtime, size) of the corpus and CSV; changes whenever either is rewritten"""
+    stamp = []
+    for path in (CORPUS_PATH, DATA_PATH):
+        try:
+            stat = path.stat()
+            stamp.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+def on_reload(callback):
+    """Register callback(bank) to run after the dataset is reloaded.
+
+    The new bank's changed_rows lists the row ids that were added or modified,
+    so derived data can be updated for those rows only.
+    """
+    _reload_callbacks.append(callback)
+    return callback
+
+def get_question_bank():
+    """Return the process-wide question bank, loading or reloading it as needed"""
+    global _bank, _bank_stamp, _bank_checked_at
+    now = time.monotonic()
+    if _bank is not None and now - _bank_checked_at < RELOAD_INTERVAL:
+        return _bank
+    with _bank_lock:
+        if _bank is not None and now - _bank_checked_at < RELOAD_INTERVAL:
+            return _bank
+        _bank_checked_at = now
+        stamp = _source_stamp()
+        if _bank is not None and stamp == _bank_stamp:
+            return _bank
+        try:
+            bank = load_question_bank(_bank)
+            if bank is None:
+                return _bank
+            if len(bank) == 0:
+                print("The dataset is empty")
+                return _bank
+        except Exception as e:
+            print(f"Error loading question bank: {str(e)}")
+            return _bank
+
+        reloaded = _bank is not None
+        _bank, _bank_stamp = bank, stamp
+        if reloaded:
+            print(f"Reloaded question bank: {len(bank.changed_rows)} new or changed questions")
+            for callback in _reload_callbacks:
+                try:
+                    callback(bank)
+                except Exception as e:
+                    print(f"Error in question bank reload callback: {str(e)}")
+    return _bank
@@ -0,0 +1,121 @@
+import random
+import threading
+import streamlit as st
+from db_utils import get_seen_questions, save_seen_questions
+
+class SeenSet:
+    """Bitmap over question row ids"""
+
+    def __init__(self, data=b''):
+        self._bits = bytearray(data)
+
+    def __contains__(self, row_id):
+        byte = row_id >> 3
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << (row_id & 7)))
+
+    def add(self, row_id):
+        byte = row_id >> 3
+        if byte >= len(self._bits):
+            self._bits.extend(bytes(byte + 1 - len(self._bits)))
+        self._bits[byte] |= 1 << (row_id & 7)
+
+    def discard(self, row_id):
+        byte = row_id >> 3
+        if byte < len(self._bits):
+            self._bits[byte] &= ~(1 << (row_id & 7)) & 0xFF
+
+    def __len__(self):
+        return sum(bin(b).count('1') for b in self._bits)
+
+    def update(self, other):
+        """Add every row id of another set"""
+        if len(other._bits) > len(self._bits):
+            self._bits.extend(bytes(len(other._bits) - len(self._bits)))
+        for i, b in enumerate(other._bits):
+            self._bits[i] |= b
+
+    def to_bytes(self):
+        return bytes(self._bits)
+
+class QuestionSampler:
+    """Draws questions a user has not seen yet, one category at a time.
+
+    The seen set is loaded from the database on the first draw and written
+    back after every draw. If it cannot be loaded, draws use a set kept in
+    memory and nothing is written, so a database outage never overwrites
+    the saved history; the load is retried on the next draw. Each category keeps a pool of unseen row ids so a
+    draw is a random swap-remove; once a category is exhausted its rows are
+    cleared from the seen set and the cycle starts over.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self._seen = None
+        self._loaded = False
+        self._bank = None
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    @property
+    def seen(self):
+        if not self._loaded:
+            data = get_seen_questions(self.user_id) if self.user_id else b''
+            if data is None:
+                if self._seen is None:
+                    self._seen = SeenSet()
+            else:
+                seen = SeenSet(data)
+                if self._seen is not None:
+                    # Keep what was drawn while the saved set was unavailable
+                    seen.update(self._seen)
+                self._seen = seen
+                self._loaded = True
+        return self._seen
+
+    def _pool(self, bank, category):
+        if bank is not self._bank:
+            # Row ids may have moved after a dataset reload
+            self._bank = bank
+            self._pools.clear()
+        pool = self._pools.get(category)
+        if pool is None:
+            seen = self.seen
+            pool = [r for r in bank.row_ids(category) if r not in seen]
+            self._pools[category] = pool
+        return pool
+
+    def draw(self, bank, category="All"):
+        """Pick an unseen row id from a category and mark it seen"""
+        with self._lock:
+            if not bank.row_ids(category):
+                return None
+            seen = self.seen
+            pool = self._pool(bank, category)
+            while True:
+                if not pool:
+                    for row_id in bank.row_ids(category):
+                        seen.discard(row_id)
+                    # Pools of overlapping categories ("All") are stale now
+                    self._pools.clear()
+                    pool = self._pool(bank, category)
+
+                i = random.randrange(len(pool))
+                pool[i], pool[-1] = pool[-1], pool[i]
+                row_id = pool.pop()
+                # Rows drawn through another category's pool are dropped lazily
+                if row_id not in seen:
+                    break
+
+            seen.add(row_id)
+            if self.user_id and self._loaded:
+                save_seen_questions(self.user_id, seen.to_bytes())
+            return row_id
+
+def get_question_sampler():
+    """Return the sampler for the logged-in user, creating it on first use"""
+    user_id = st.session_state.get('user_id')
+    sampler = st.session_state.get('question_sampler')
+    if sampler is None or sampler.user_id != user_id:
+        sampler = QuestionSampler(user_id)
+        st.session_state['question_sampler'] = sampler
+    return sampler
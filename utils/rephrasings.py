@@ -0,0 +1,95 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+REPHRASINGS_PATH = Path(os.getenv(
+    'REPHRASINGS_PATH',
+    Path(__file__).parent.parent / 'data' / 'rephrasings.db'
+))
+
+def question_id(question):
+    """Stable id for a source question, independent of its row in the dataset"""
+    return hashlib.sha1(question.encode('utf-8')).hexdigest()[:16]
+
+class RephrasingStore:
+    """Pre-generated conversational variants of the source questions.
+
+    Variants are keyed by question id and prompt version, so changing the
+    rephrasing prompt simply leaves the old variants unused. The store is a
+    SQLite file that several app processes can read while the batch job
+    writes to it.
+    """
+
+    def __init__(self, path=REPHRASINGS_PATH):
+        self.path = Path(path)
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS rephrasings (
+                    question_id TEXT NOT NULL,
+                    prompt_version INTEGER NOT NULL,
+                    variant INTEGER NOT NULL,
+                    text TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (question_id, prompt_version, variant)
+                )
+            ''')
+            self._local.conn = conn
+        return conn
+
+    def get(self, qid, prompt_version):
+        """Return the stored variants for a question"""
+        try:
+            rows = self._connect().execute('''
+                SELECT text FROM rephrasings
+                WHERE question_id = ? AND prompt_version = ?
+                ORDER BY variant
+            ''', (qid, prompt_version)).fetchall()
+            return [row[0] for row in rows]
+        except sqlite3.Error as e:
+            print(f"Error reading rephrasings: {str(e)}")
+            return []
+
+    def count(self, qid, prompt_version):
+        """Return how many variants are stored for a question"""
+        try:
+            return self._connect().execute('''
+                SELECT COUNT(*) FROM rephrasings
+                WHERE question_id = ? AND prompt_version = ?
+            ''', (qid, prompt_version)).fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Error reading rephrasings: {str(e)}")
+            return 0
+
+    def add(self, qid, prompt_version, variants):
+        """Append variants for a question and commit them"""
+        try:
+            conn = self._connect()
+            with conn:
+                # Take the write lock before reading MAX(variant), so two
+                # writers cannot pick the same variant numbers
+                conn.execute('BEGIN IMMEDIATE')
+                start = conn.execute('''
+                    SELECT COALESCE(MAX(variant) + 1, 0) FROM rephrasings
+                    WHERE question_id = ? AND prompt_version = ?
+                ''', (qid, prompt_version)).fetchone()[0]
+                now = time.time()
+                conn.executemany('''
+                    INSERT INTO rephrasings (question_id, prompt_version, variant, text, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', [(qid, prompt_version, start + i, text, now) for i, text in enumerate(variants)])
+            return True
+        except sqlite3.Error as e:
+            print(f"Error saving rephrasings: {str(e)}")
+            return False
+
+rephrasing_store = RephrasingStore()
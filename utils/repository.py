@@ -0,0 +1,267 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import psycopg2
+from psycopg2.extras import DictCursor, execute_values
+from utils.db_pool import db_connection
+
+# Every query the app runs, by name. Each one is prepared on a pooled
+# connection the first time it is used there and executed by name after
+# that, so Postgres parses and plans it once per connection.
+STATEMENTS = {
+    'user_create': '''
+        INSERT INTO users (name, email, password_hash)
+        VALUES ($1, $2, $3)
+        ON CONFLICT (email) DO NOTHING
+        RETURNING id
+    ''',
+    'user_by_email': '''
+        SELECT id, name, password_hash FROM users
+        WHERE email = $1
+    ''',
+    'user_seen_questions': '''
+        SELECT seen FROM user_seen_questions
+        WHERE user_id = $1
+    ''',
+    'user_save_seen_questions': '''
+        INSERT INTO user_seen_questions (user_id, seen)
+        VALUES ($1, $2)
+        ON CONFLICT (user_id)
+        DO UPDATE SET seen = EXCLUDED.seen, updated_at = CURRENT_TIMESTAMP
+    ''',
+    'interview_create': '''
+        INSERT INTO interviews (user_id, category)
+        VALUES ($1, $2)
+        RETURNING id
+    ''',
+    'interview_finalize': '''
+        WITH summary AS (
+            SELECT COALESCE(AVG(score), 0) AS score, COUNT(*) AS total_questions
+            FROM question_responses
+            WHERE interview_id = $1
+        )
+        UPDATE interviews
+        SET score = summary.score, total_questions = summary.total_questions,
+            completed_at = CURRENT_TIMESTAMP
+        FROM summary
+        WHERE interviews.id = $1
+        RETURNING interviews.id, interviews.category, interviews.score,
+                  interviews.total_questions, interviews.completed_at
+    ''',
+    'interviews_for_user': '''
+        SELECT id, category, score, total_questions, completed_at
+        FROM interviews
+        WHERE user_id = $1
+        ORDER BY completed_at DESC
+    ''',
+    'response_create': '''
+        INSERT INTO question_responses
+        (interview_id, question, user_answer, model_answer, score, feedback,
+         matched_terms, missing_terms, scoring_ms, time_taken)
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+    ''',
+    'responses_for_interview': '''
+        SELECT question, user_answer, model_answer, score, feedback,
+               matched_terms, missing_terms, scoring_ms, time_taken
+        FROM question_responses
+        WHERE interview_id = $1
+        ORDER BY created_at ASC
+    ''',
+    'stats_for_user': '''
+        SELECT COUNT(*), AVG(score), MAX(score), MIN(score)
+        FROM interviews
+        WHERE user_id = $1
+    ''',
+    'stats_token_usage': '''
+        SELECT COALESCE(SUM(COALESCE(prompt_tokens, 0) + COALESCE(completion_tokens, 0)), 0)
+        FROM llm_calls
+        WHERE user_id = $1 AND created_at >= $2
+    '''
+}
+
+class Users:
+    def __init__(self, repo):
+        self.repo = repo
+
+    def create(self, name, email, password_hash):
+        """Insert a user and return their id, or None if the email is taken"""
+        with self.repo.execute('user_create', (name, email, password_hash)) as cur:
+            row = cur.fetchone()
+            return row[0] if row else None
+
+    def by_email(self, email):
+        """{'id', 'name', 'password_hash'} of the user with an email, or None"""
+        with self.repo.execute('user_by_email', (email,), DictCursor) as cur:
+            row = cur.fetchone()
+            return dict(row) if row else None
+
+    def seen_questions(self, user_id):
+        """The user's seen-question bitmap; empty if nothing is saved yet"""
+        with self.repo.execute('user_seen_questions', (user_id,)) as cur:
+            row = cur.fetchone()
+            return bytes(row[0]) if row else b''
+
+    def save_seen_questions(self, user_id, seen):
+        with self.repo.execute('user_save_seen_questions', (user_id, psycopg2.Binary(seen))):
+            pass
+
+class Interviews:
+    def __init__(self, repo):
+        self.repo = repo
+
+    def create(self, user_id, category):
+        with self.repo.execute('interview_create', (user_id, category)) as cur:
+            return cur.fetchone()[0]
+
+    def finalize(self, interview_id):
+        """Score an interview from its saved answers and mark it completed
+
+        The average and count are computed in the same statement that
+        updates the row. Returns the updated interview, or None if there is
+        no interview with that id.
+        """
+        with self.repo.execute('interview_finalize', (interview_id,), DictCursor) as cur:
+            row = cur.fetchone()
+            if row is None:
+                return None
+            summary = dict(row)
+            summary['score'] = float(summary['score'])
+            return summary
+
+    def for_user(self, user_id):
+        """A user's interviews, most recently completed first"""
+        with self.repo.execute('interviews_for_user', (user_id,), DictCursor) as cur:
+            return [dict(i) for i in cur.fetchall()]
+
+class Responses:
+    def __init__(self, repo):
+        self.repo = repo
+
+    def create(self, interview_id, user_answer, evaluation, time_taken):
+        """Insert one answer with its structured evaluation"""
+        with self.repo.execute('response_create', (
+            interview_id, evaluation.question, user_answer, evaluation.ideal_answer,
+            evaluation.score, evaluation.feedback_text(), list(evaluation.matched_terms),
+            list(evaluation.missing_terms), evaluation.scoring_ms, time_taken
+        )):
+            pass
+
+    def create_many(self, rows):
+        """Insert many answers in one round trip
+
+        rows are (interview_id, user_answer, evaluation, time_taken, created_at)
+        tuples; created_at is passed explicitly so answers written in one
+        batch keep the order they were given in.
+        """
+        with self.repo.conn.cursor() as cur:
+            execute_values(cur, '''
+                INSERT INTO question_responses
+                (interview_id, question, user_answer, model_answer, score, feedback,
+                 matched_terms, missing_terms, scoring_ms, time_taken, created_at)
+                VALUES %s
+            ''', [(
+                interview_id, evaluation.question, user_answer, evaluation.ideal_answer,
+                evaluation.score, evaluation.feedback_text(), list(evaluation.matched_terms),
+                list(evaluation.missing_terms), evaluation.scoring_ms, time_taken, created_at
+            ) for interview_id, user_answer, evaluation, time_taken, created_at in rows])
+
+    def for_interview(self, interview_id):
+        """An interview's answers in the order they were given"""
+        with self.repo.execute('responses_for_interview', (interview_id,), DictCursor) as cur:
+            return [dict(r) for r in cur.fetchall()]
+
+class Stats:
+    def __init__(self, repo):
+        self.repo = repo
+
+    def for_user(self, user_id):
+        with self.repo.execute('stats_for_user', (user_id,)) as cur:
+            total, average, best, worst = cur.fetchone()
+            return {
+                'total_interviews': total,
+                'average_score': average,
+                'best_score': best,
+                'worst_score': worst
+            }
+
+    def token_usage(self, user_id, since):
+        """Prompt plus completion tokens a user has spent since a timestamp"""
+        with self.repo.execute('stats_token_usage', (user_id, since)) as cur:
+            return int(cur.fetchone()[0])
+
+    def save_llm_calls(self, calls):
+        """Insert a batch of LLM call records in one round trip"""
+        with self.repo.conn.cursor() as cur:
+            execute_values(cur, '''
+                INSERT INTO llm_calls
+                (user_id, interview_id, call_site, model, prompt_tokens, completion_tokens,
+                 latency_ms, ttft_ms, cache, outcome, created_at)
+                VALUES %s
+            ''', [(
+                c['user_id'], c['interview_id'], c['call_site'], c['model'],
+                c['prompt_tokens'], c['completion_tokens'], c['latency_ms'],
+                c['ttft_ms'], c['cache'], c['outcome'], c['created_at']
+            ) for c in calls])
+
+class Repository:
+    """Typed access to every table, over one connection and transaction"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        # Nesting level of transaction() scopes, for savepoint names
+        self.depth = 0
+        self.users = Users(self)
+        self.interviews = Interviews(self)
+        self.responses = Responses(self)
+        self.stats = Stats(self)
+
+    def execute(self, name, params, cursor_factory=None):
+        """Run a named statement, preparing it on this connection first if needed"""
+        cur = self.conn.cursor(cursor_factory=cursor_factory)
+        try:
+            if name not in self.conn.prepared:
+                cur.execute(f"PREPARE {name} AS {STATEMENTS[name]}")
+                self.conn.prepared.add(name)
+            cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+            return cur
+        except Exception:
+            cur.close()
+            raise
+
+_current = ContextVar('repository', default=None)
+
+@contextmanager
+def transaction():
+    """Repository for one unit of work, such as handling a click
+
+    Commits when the block finishes and rolls back if it raises. Nested
+    calls join the enclosing transaction, so a request that goes through
+    several db_utils functions still commits once on one connection. Each
+    nested scope runs in a savepoint: if it raises, only its own statements
+    are rolled back and the enclosing transaction stays usable.
+    """
+    repo = _current.get()
+    if repo is not None:
+        repo.depth += 1
+        savepoint = f"nested_{repo.depth}"
+        try:
+            with repo.conn.cursor() as cur:
+                cur.execute(f"SAVEPOINT {savepoint}")
+            try:
+                yield repo
+            except BaseException:
+                with repo.conn.cursor() as cur:
+                    cur.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                raise
+            with repo.conn.cursor() as cur:
+                cur.execute(f"RELEASE SAVEPOINT {savepoint}")
+        finally:
+            repo.depth -= 1
+        return
+    with db_connection() as conn:
+        repo = Repository(conn)
+        token = _current.set(repo)
+        try:
+            yield repo
+            conn.commit()
+        finally:
+            _current.reset(token)
@@ -0,0 +1,129 @@
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+import psycopg2
+from utils.db_pool import PoolTimeout
+from utils.repository import transaction
+
+# Answers held in memory at most; when full, the submitting request writes them itself
+RESPONSE_QUEUE_SIZE = int(os.getenv('RESPONSE_QUEUE_SIZE', '1000'))
+RESPONSE_FLUSH_SIZE = int(os.getenv('RESPONSE_FLUSH_SIZE', '50'))
+RESPONSE_FLUSH_INTERVAL = float(os.getenv('RESPONSE_FLUSH_INTERVAL', '2'))
+RESPONSE_WRITE_RETRIES = int(os.getenv('RESPONSE_WRITE_RETRIES', '3'))
+
+# Errors worth retrying: lost connections, serialization failures, an exhausted pool
+TRANSIENT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError, PoolTimeout)
+
+def _save(rows):
+    with transaction() as repo:
+        repo.responses.create_many(rows)
+
+class ResponseWriter:
+    """Write-behind queue for question responses.
+
+    Submitting an answer only appends it to a bounded in-memory queue. A
+    background thread writes the queue with one multi-row insert once
+    `flush_size` answers are pending or every `flush_interval` seconds.
+    flush() writes everything queued so far before returning; it runs when
+    the process exits. take() hands one interview's answers to the caller,
+    which saves them together with its final score.
+    """
+
+    def __init__(self, save=_save, maxsize=RESPONSE_QUEUE_SIZE, flush_size=RESPONSE_FLUSH_SIZE,
+                 flush_interval=RESPONSE_FLUSH_INTERVAL, retries=RESPONSE_WRITE_RETRIES):
+        self.save = save
+        self.maxsize = maxsize
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self._queue = deque()
+        self._lock = threading.Lock()
+        # Held while a batch is written, so batches go out one at a time and in order
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def add(self, interview_id, user_answer, evaluation, time_taken):
+        """Queue one answer; returns without touching the database unless the queue is full"""
+        with self._lock:
+            self._queue.append((interview_id, user_answer, evaluation, time_taken, datetime.now()))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='response-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+            pending = len(self._queue)
+        if pending >= self.maxsize:
+            # Back-pressure: write the backlog here rather than grow without bound
+            self.flush()
+        elif pending >= self.flush_size:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _write(self, batch):
+        """Write a batch, retrying transient errors
+
+        Returns the rows that still need a later attempt; rows rejected for
+        any other reason are reported and dropped.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                self.save(batch)
+                return []
+            except TRANSIENT_ERRORS as e:
+                if attempt == self.retries:
+                    print(f"Error saving question responses, will retry later: {str(e)}")
+                    return batch
+                time.sleep(0.2 * 2 ** attempt)
+            except Exception as e:
+                print(f"Error saving question responses: {str(e)}")
+                break
+        # A bad row fails the whole insert; save the rest one at a time
+        retry = []
+        if len(batch) > 1:
+            for row in batch:
+                retry.extend(self._write([row]))
+        return retry
+
+    def take(self, interview_id):
+        """Remove and return the queued answers of one interview
+
+        Waits for a batch that is being written to finish first, so every
+        answer of the interview is either saved or in the returned list.
+        """
+        with self._write_lock, self._lock:
+            rows = [r for r in self._queue if r[0] == interview_id]
+            if rows:
+                self._queue = deque(r for r in self._queue if r[0] != interview_id)
+            return rows
+
+    def requeue(self, rows):
+        """Put answers returned by take() back, to be written by the background thread"""
+        with self._lock:
+            self._queue.extendleft(reversed(rows))
+
+    def flush(self):
+        """Write every queued answer; False if some could not be written yet"""
+        with self._write_lock:
+            with self._lock:
+                batch = list(self._queue)
+                self._queue.clear()
+            retry = self._write(batch) if batch else []
+            if not retry:
+                return True
+            with self._lock:
+                # Keep the answers for the next attempt, oldest first, within the bound
+                self._queue.extendleft(reversed(retry))
+                while len(self._queue) > self.maxsize:
+                    self._queue.popleft()
+                    print("Dropped a question response; the write queue is full")
+            return False
+
+response_writer = ResponseWriter()
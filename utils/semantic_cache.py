@@ -0,0 +1,114 @@
+import os
+import re
+import threading
+import time
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+SEMANTIC_CACHE_SIZE = int(os.getenv('SEMANTIC_CACHE_SIZE', '512'))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.9'))
+SEMANTIC_CACHE_TTL = float(os.getenv('SEMANTIC_CACHE_TTL', str(7 * 24 * 3600)))
+
+# Phrases that frame a question without changing what is being asked. Kept
+# deliberately short: negations, wh-words and comparatives change the meaning.
+_FRAMING = re.compile(r"\b(?:what is|what are|explain|describe|define|tell me about)\b")
+
+# Single-character tokens count too ("Python 2" vs "Python 3")
+_word_vectorizer = HashingVectorizer(analyzer='word', ngram_range=(1, 2), alternate_sign=False,
+                                     token_pattern=r"(?u)\b\w+\b", norm='l2', n_features=2 ** 18)
+_char_vectorizer = HashingVectorizer(analyzer='char_wb', ngram_range=(3, 5), alternate_sign=False,
+                                     norm='l2', n_features=2 ** 18)
+
+def question_terms(text):
+    """Lowercased words of a question, framing phrases removed"""
+    return ' '.join(re.findall(r'[a-z0-9]+', _FRAMING.sub(' ', text.lower())))
+
+def embed_questions(texts):
+    """L2-normalized sparse vectors; word n-grams plus character n-grams for typos"""
+    terms = [question_terms(t) for t in texts]
+    return normalize((_word_vectorizer.transform(terms) + _char_vectorizer.transform(terms)).tocsr())
+
+class SemanticCache:
+    """Answers to previously asked questions, looked up by similarity.
+
+    Holds at most `max_entries` answers. Entries expire after `ttl` seconds;
+    when the cache is full the entry with the fewest hits for its age is
+    evicted.
+    """
+
+    def __init__(self, max_entries=SEMANTIC_CACHE_SIZE, threshold=SEMANTIC_CACHE_THRESHOLD,
+                 ttl=SEMANTIC_CACHE_TTL):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._vectors = []
+        self._answers = []
+        self._created = []
+        self._hit_counts = []
+        self._matrix = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._answers)
+
+    def _remove(self, i):
+        for column in (self._vectors, self._answers, self._created, self._hit_counts):
+            column.pop(i)
+        self._matrix = None
+        self.evictions += 1
+
+    def _evict(self, now):
+        for i in reversed(range(len(self._created))):
+            if now - self._created[i] > self.ttl:
+                self._remove(i)
+        while len(self._answers) >= self.max_entries:
+            # Frequency discounted by age: hits per hour since the entry was added
+            scores = [(hits + 1) / (1 + (now - created) / 3600)
+                      for hits, created in zip(self._hit_counts, self._created)]
+            self._remove(scores.index(min(scores)))
+
+    def lookup(self, question):
+        """Return the stored answer of the most similar question above the threshold"""
+        vector = embed_questions([question])
+        with self._lock:
+            if not self._answers:
+                self.misses += 1
+                return None
+            if self._matrix is None:
+                self._matrix = sp.vstack(self._vectors).tocsr()
+            similarities = (self._matrix @ vector.T).toarray().ravel()
+            best = int(similarities.argmax())
+            if similarities[best] < self.threshold or time.time() - self._created[best] > self.ttl:
+                self.misses += 1
+                return None
+            self._hit_counts[best] += 1
+            self.hits += 1
+            return self._answers[best]
+
+    def add(self, question, answer):
+        """Store the answer to a question"""
+        vector = embed_questions([question])
+        if vector.nnz == 0:
+            return
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            self._vectors.append(vector)
+            self._answers.append(answer)
+            self._created.append(now)
+            self._hit_counts.append(0)
+            self._matrix = None
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self)
+        }
+
+semantic_cache = SemanticCache()